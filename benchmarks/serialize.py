@@ -0,0 +1,73 @@
+"""Benchmark the bulk serialization against per-object serialization."""
+
+import json
+import timeit
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+import orjson
+
+from autarco import Battery, Site, Solar, dumps_batch, dumps_ndjson
+from autarco.models import PowerResponse
+
+FIXTURES = Path(__file__).parent.parent / "tests" / "fixtures"
+SITES = 1000
+ROUNDS = 20
+
+
+def load(name: str) -> dict[str, Any]:
+    """Load a JSON fixture."""
+    data: dict[str, Any] = json.loads((FIXTURES / name).read_text())
+    return data
+
+
+def fleet() -> list[Any]:
+    """Create the objects of a fleet poll."""
+    site = Site.from_dict({**load("site.json"), **load("kpis_energy.json")})
+    solar = Solar.from_dict({**load("kpis_power.json"), **load("kpis_energy.json")})
+    battery = Battery.from_dict(
+        {**load("battery/kpis_power.json"), **load("battery/kpis_energy.json")}
+    )
+    inverters = PowerResponse.from_dict(load("power.json")).inverters.values()
+    return [site, solar, battery, *inverters] * SITES
+
+
+def to_dict_batch(objects: list[Any]) -> bytes:
+    """Serialize every object with to_dict, into one JSON array."""
+    return orjson.dumps([obj.to_dict() for obj in objects])
+
+
+def to_dict_ndjson(objects: list[Any]) -> bytes:
+    """Serialize every object with to_dict, as JSON lines."""
+    return b"".join(
+        orjson.dumps(obj.to_dict(), option=orjson.OPT_APPEND_NEWLINE) for obj in objects
+    )
+
+
+def measure(function: Callable[[list[Any]], bytes], objects: list[Any]) -> float:
+    """Get the best time of a serializer in milliseconds."""
+    return 1000 * min(timeit.repeat(lambda: function(objects), number=1, repeat=ROUNDS))
+
+
+def main() -> None:
+    """Run the benchmark."""
+    objects = fleet()
+    if dumps_batch(objects) != to_dict_batch(objects):
+        msg = "The bulk serializer does not match to_dict"
+        raise RuntimeError(msg)
+
+    print(f"{len(objects)} objects, best of {ROUNDS} rounds")
+    for name, baseline, bulk in (
+        ("JSON array", to_dict_batch, dumps_batch),
+        ("JSON lines", to_dict_ndjson, dumps_ndjson),
+    ):
+        before, after = measure(baseline, objects), measure(bulk, objects)
+        print(
+            f"{name}: to_dict {before:.2f} ms, bulk {after:.2f} ms"
+            f" ({before / after:.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,23 +1,101 @@
 """Asynchronous Python client for the Autarco API."""
 
+from .aggregation import FleetAggregator, Summary
 from .autarco import Autarco
+from .breaker import BreakerState, CircuitBreaker
+from .config import (
+    BreakerConfig,
+    HedgeConfig,
+    LocalEnergyConfig,
+    OffloadConfig,
+    TimeoutConfig,
+)
+from .differ import Delta, SnapshotDiffer
 from .exceptions import (
     AutarcoAuthenticationError,
+    AutarcoCircuitOpenError,
     AutarcoConnectionError,
     AutarcoError,
+    AutarcoRequestDroppedError,
+)
+from .export import (
+    StatsRow,
+    iter_fleet_rows,
+    iter_rows,
+    write_arrow,
+    write_csv,
+    write_ndjson,
+    write_parquet,
 )
+from .latency import HedgeStats, LatencyTracker, timeout_override
+from .localtime import LocalTime
 from .models import AccountSite, Battery, DateStrategy, Inverter, Site, Solar, Stats
+from .monitor import LoopLagMonitor
+from .pool import AutarcoPool, FairLimiter
+from .priority import Priority, RequestScheduler, request_priority
+from .profiling import Profiler
+from .registry import FleetRegistry, InverterEntry, InverterIndex
+from .scheduler import AdaptiveScheduler, Cadence
+from .serialize import BulkSerializer, dumps_batch, dumps_ndjson
+from .series import Series
+from .stream import OverflowPolicy, Snapshot, SnapshotStream
+from .swr import Cached, StaleWhileRevalidate
 
 __all__ = [
     "AccountSite",
+    "AdaptiveScheduler",
     "Autarco",
     "AutarcoAuthenticationError",
+    "AutarcoCircuitOpenError",
     "AutarcoConnectionError",
     "AutarcoError",
+    "AutarcoPool",
+    "AutarcoRequestDroppedError",
     "Battery",
+    "BreakerConfig",
+    "BreakerState",
+    "BulkSerializer",
+    "Cached",
+    "Cadence",
+    "CircuitBreaker",
     "DateStrategy",
+    "Delta",
+    "FairLimiter",
+    "FleetAggregator",
+    "FleetRegistry",
+    "HedgeConfig",
+    "HedgeStats",
     "Inverter",
+    "InverterEntry",
+    "InverterIndex",
+    "LatencyTracker",
+    "LocalEnergyConfig",
+    "LocalTime",
+    "LoopLagMonitor",
+    "OffloadConfig",
+    "OverflowPolicy",
+    "Priority",
+    "Profiler",
+    "RequestScheduler",
+    "Series",
     "Site",
+    "Snapshot",
+    "SnapshotDiffer",
+    "SnapshotStream",
     "Solar",
+    "StaleWhileRevalidate",
     "Stats",
+    "StatsRow",
+    "Summary",
+    "TimeoutConfig",
+    "dumps_batch",
+    "dumps_ndjson",
+    "iter_fleet_rows",
+    "iter_rows",
+    "request_priority",
+    "timeout_override",
+    "write_arrow",
+    "write_csv",
+    "write_ndjson",
+    "write_parquet",
 ]
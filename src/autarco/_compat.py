@@ -0,0 +1,15 @@
+"""Optional dependencies for Autarco."""
+
+from __future__ import annotations
+
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from types import ModuleType
+
+np: ModuleType | None
+try:
+    np = importlib.import_module("numpy")
+except ImportError:  # pragma: no cover
+    np = None
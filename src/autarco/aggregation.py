@@ -0,0 +1,235 @@
+"""Fleet-wide aggregation of Autarco data."""
+
+from __future__ import annotations
+
+import math
+from array import array
+from dataclasses import dataclass, field, fields
+from typing import TYPE_CHECKING
+
+from . import _compat
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Sequence
+    from datetime import date, datetime, timedelta
+
+    from .models import Battery, Solar, Stats
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """Calculate a percentile with linear interpolation.
+
+    Uses the same method as the default of `numpy.percentile`.
+
+    Args:
+    ----
+        values: The values, sorted in ascending order.
+        q: The percentile to calculate, between 0 and 100.
+
+    Returns:
+    -------
+        The percentile of the values.
+
+    """
+    position = (len(values) - 1) * q / 100
+    lower = math.floor(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def trapezoid(
+    timestamps: Sequence[datetime],
+    values: Sequence[int | float | None],
+    max_gap: timedelta | None = None,
+) -> float:
+    """Integrate a power curve with the trapezoidal rule.
+
+    An interval is skipped when one of its samples is missing (None), or
+    when it is longer than `max_gap`, instead of interpolating over the gap.
+
+    Args:
+    ----
+        timestamps: The timestamps of the samples, sorted by time.
+        values: The power in W per timestamp.
+        max_gap: The longest interval between two samples to integrate.
+
+    Returns:
+    -------
+        The energy in kWh.
+
+    """
+    limit = math.inf if max_gap is None else max_gap.total_seconds()
+    if (np := _compat.np) is not None:
+        widths = np.diff(np.array(timestamps, dtype="datetime64[s]").astype(np.float64))
+        power = np.array(values, dtype=np.float64)
+        heights = (power[1:] + power[:-1]) / 2
+        valid = ~np.isnan(heights) & (widths <= limit)
+        return float((heights[valid] * widths[valid]).sum()) / 3_600_000
+
+    total = 0.0
+    for start, end, first, second in zip(
+        timestamps, timestamps[1:], values, values[1:], strict=False
+    ):
+        width = (end - start).total_seconds()
+        if first is not None and second is not None and width <= limit:
+            total += (first + second) / 2 * width
+    return total / 3_600_000
+
+
+@dataclass
+class Summary:
+    """Object representing the summary of a column of fleet values."""
+
+    count: int
+    total: float
+    mean: float | None = None
+    minimum: float | None = None
+    maximum: float | None = None
+    percentiles: dict[float, float] = field(default_factory=dict)
+
+
+@dataclass
+class FleetAggregator:
+    """Collect fleet data into columnar buffers and aggregate it.
+
+    Every integer field of the added `Solar` and `Battery` objects is stored
+    in its own column, and the graphs of added `Stats` objects are stored as
+    flat timestamp/value buffers. Aggregation runs vectorized with NumPy when
+    it is installed, with a pure-Python fallback.
+    """
+
+    percentiles: tuple[float, ...] = (50.0, 90.0, 99.0)
+
+    _columns: dict[str, array[float]] = field(default_factory=dict)
+    _series: dict[str, tuple[list[datetime | date], array[float]]] = field(
+        default_factory=dict
+    )
+
+    def add(self, obj: Solar | Battery) -> None:
+        """Add the values of a Solar or Battery object.
+
+        Args:
+        ----
+            obj: The Solar or Battery object.
+
+        """
+        for item in fields(obj):
+            self._columns.setdefault(item.name, array("d")).append(
+                getattr(obj, item.name)
+            )
+
+    def add_many(self, objects: Iterable[Solar | Battery]) -> None:
+        """Add the values of many Solar or Battery objects.
+
+        Args:
+        ----
+            objects: The Solar or Battery objects.
+
+        """
+        for obj in objects:
+            self.add(obj)
+
+    def add_stats(self, stats: Stats) -> None:
+        """Add the graph series of all inverters in a Stats object.
+
+        Args:
+        ----
+            stats: The Stats object, from the power or energy statistics.
+
+        """
+        for name in ("pv_power", "pv_energy"):
+            graph = getattr(stats.graphs, name)
+            if not graph:
+                continue
+            timestamps, values = self._series.setdefault(name, ([], array("d")))
+            for series in graph.values():
+                for timestamp, value in series.items():
+                    # Missing samples are left out, instead of counting as 0.
+                    if value is not None:
+                        timestamps.append(timestamp)
+                        values.append(value)
+
+    def column(self, name: str) -> array[float]:
+        """Get the buffer of a column, for example 'power_production'.
+
+        Args:
+        ----
+            name: The name of the model field.
+
+        Returns:
+        -------
+            The collected values of the column.
+
+        """
+        return self._columns.get(name, array("d"))
+
+    def summary(self, name: str) -> Summary:
+        """Summarize a column with the total, mean and percentiles.
+
+        Args:
+        ----
+            name: The name of the model field, for example 'state_of_charge'.
+
+        Returns:
+        -------
+            A Summary object.
+
+        """
+        values = self.column(name)
+        if not values:
+            return Summary(count=0, total=0.0)
+
+        if (np := _compat.np) is not None:
+            data = np.frombuffer(values, dtype=np.float64)
+            points = np.percentile(data, self.percentiles)
+            return Summary(
+                count=len(data),
+                total=float(data.sum()),
+                mean=float(data.mean()),
+                minimum=float(data.min()),
+                maximum=float(data.max()),
+                percentiles=dict(
+                    zip(self.percentiles, map(float, points), strict=True)
+                ),
+            )
+
+        ordered = sorted(values)
+        total = math.fsum(ordered)
+        return Summary(
+            count=len(ordered),
+            total=total,
+            mean=total / len(ordered),
+            minimum=ordered[0],
+            maximum=ordered[-1],
+            percentiles={q: percentile(ordered, q) for q in self.percentiles},
+        )
+
+    def curve(self, name: str = "pv_power") -> dict[datetime | date, float]:
+        """Sum the graph series of all inverters, aligned by timestamp.
+
+        Args:
+        ----
+            name: The graph to sum, 'pv_power' or 'pv_energy'.
+
+        Returns:
+        -------
+            A dictionary with the fleet total per timestamp, sorted by time.
+
+        """
+        if name not in self._series:
+            return {}
+        timestamps, values = self._series[name]
+
+        if (np := _compat.np) is not None:
+            unit = "s" if name == "pv_power" else "D"
+            keys, inverse = np.unique(
+                np.array(timestamps, dtype=f"datetime64[{unit}]"),
+                return_inverse=True,
+            )
+            sums = np.bincount(inverse, weights=np.frombuffer(values, dtype=np.float64))
+            return dict(zip(keys.tolist(), sums.tolist(), strict=True))
+
+        totals: dict[datetime | date, float] = {}
+        for timestamp, value in zip(timestamps, values, strict=True):
+            totals[timestamp] = totals.get(timestamp, 0.0) + value
+        return dict(sorted(totals.items()))
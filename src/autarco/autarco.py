@@ -3,21 +3,33 @@
 from __future__ import annotations
 
 import asyncio
+import inspect
 import json
+import os
 import socket
-from dataclasses import dataclass
+import time
+from contextlib import AsyncExitStack, asynccontextmanager
+from dataclasses import dataclass, field
+from datetime import UTC, date, datetime
 from importlib import metadata
-from typing import Any, Self
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Self
 
 from aiohttp import BasicAuth, ClientError, ClientResponseError, ClientSession
 from aiohttp.hdrs import METH_GET
+from mashumaro.exceptions import MissingField
 from yarl import URL
 
+from .breaker import BreakerState, CircuitBreaker
 from .exceptions import (
     AutarcoAuthenticationError,
+    AutarcoCircuitOpenError,
     AutarcoConnectionError,
     AutarcoError,
+    AutarcoRequestDroppedError,
 )
+from .latency import HedgeStats, LatencyTracker, current_timeout_override
+from .localtime import get_local_time
 from .models import (
     AccountResponse,
     AccountSite,
@@ -29,10 +41,97 @@ from .models import (
     Solar,
     Stats,
 )
+from .priority import Priority, RequestScheduler, current_priority
+from .profiling import Profiler, get_profiler
+from .stream import OverflowPolicy, Snapshot, SnapshotStream
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator, Callable
+
+    from .config import (
+        BreakerConfig,
+        HedgeConfig,
+        LocalEnergyConfig,
+        OffloadConfig,
+        TimeoutConfig,
+    )
+    from .pool import FairLimiter
 
 VERSION: str = metadata.version(__package__)  # ty:ignore[invalid-argument-type]
 
 
+def _endpoint(uri: str) -> tuple[str, str]:
+    """Split a request URI into the site public key and endpoint template.
+
+    Args:
+    ----
+        uri: Request URI, for example, 'site_key/kpis/power'.
+
+    Returns:
+    -------
+        The public key and template, for example '{public_key}/kpis/power'.
+
+    """
+    if not uri:
+        return "", ""
+    public_key, _, path = uri.partition("/")
+    return public_key, f"{{public_key}}/{path}"
+
+
+def _latency_key(uri: str, params: dict[str, Any] | None = None) -> str:
+    """Get the key the latency of a request is tracked under.
+
+    The statistics endpoints serve both quick and long ranges, so the range
+    is part of the key, for example '{public_key}/power?r=year'.
+
+    Args:
+    ----
+        uri: Request URI, for example, 'site_key/power'.
+        params: Query parameters sent with the request.
+
+    Returns:
+    -------
+        The endpoint template, with the range if one is given.
+
+    """
+    template = _endpoint(uri)[1]
+    if params and "r" in params:
+        return f"{template}?r={params['r']}"
+    return template
+
+
+def _is_failure(exception: AutarcoError) -> bool:
+    """Return True if the error means the endpoint is unavailable.
+
+    Timeouts, connection errors and server errors count as failures, while
+    an answer from the API such as 401 or 404 does not.
+    """
+    if not isinstance(exception, AutarcoConnectionError):
+        return False
+    cause = exception.__cause__
+    return not (isinstance(cause, ClientResponseError) and cause.status < 500)
+
+
+def _site_date(timezone: str | None) -> date:
+    """Get the current date of a site, in the host timezone when unknown."""
+    now = datetime.now(UTC)
+    if timezone is None:
+        return now.astimezone().date()
+    return now.astimezone(get_local_time(timezone).zone).date()
+
+
+def _curve_date(stats: Stats) -> date | None:
+    """Get the local date of the last sample of the power graph."""
+    return max(
+        (
+            max(power_data).date()
+            for power_data in (stats.graphs.pv_power or {}).values()
+            if power_data
+        ),
+        default=None,
+    )
+
+
 @dataclass
 class Autarco:
     """Main class for handling connections to Autarco."""
@@ -43,7 +142,49 @@ class Autarco:
     request_timeout: float = 15.0
     session: ClientSession | None = None
 
+    breaker: BreakerConfig | None = None
+
+    limiter: FairLimiter | None = None
+    request_scheduler: RequestScheduler | None = None
+
+    hedging: HedgeConfig | None = None
+    timeouts: TimeoutConfig | None = None
+    hedge_stats: HedgeStats = field(default_factory=HedgeStats)
+    latency: LatencyTracker = field(default_factory=LatencyTracker)
+
+    offload: OffloadConfig | None = None
+
+    local_energy: LocalEnergyConfig | None = None
+    energy_mismatches: int = 0
+
+    profiler: Profiler | None = None
+
+    warm_up_connections: int = 0
+
     _close_session: bool = False
+    _breakers: dict[tuple[str, str], CircuitBreaker] = field(default_factory=dict)
+    _day_power: dict[str, tuple[date, Stats]] = field(default_factory=dict)
+    _timezones: dict[str, str] = field(default_factory=dict)
+
+    def __post_init__(self) -> None:
+        """Profile the public methods, when enabled.
+
+        Profiling is enabled by passing a `Profiler`, or by setting the
+        `AUTARCO_PROFILE` environment variable to the output directory, in
+        which case all clients share a profiler. Otherwise the methods are
+        left untouched.
+        """
+        if self.profiler is None and (directory := os.environ.get("AUTARCO_PROFILE")):
+            self.profiler = get_profiler(Path(directory).resolve())
+        if self.profiler is None:
+            return
+        for name, value in vars(type(self)).items():
+            if (
+                not name.startswith("_")
+                and name != "close"
+                and inspect.iscoroutinefunction(value)
+            ):
+                setattr(self, name, self.profiler.wrap(name, getattr(self, name)))
 
     async def _request(
         self,
@@ -51,6 +192,7 @@ class Autarco:
         *,
         method: str = METH_GET,
         params: dict[str, Any] | None = None,
+        priority: Priority = Priority.INTERACTIVE,
     ) -> str:
         """Handle a request to the Autarco API.
 
@@ -62,6 +204,8 @@ class Autarco:
             uri: Request URI, without '/', for example, 'status'.
             method: HTTP method to use.
             params: Query parameters to send with the request.
+            priority: The priority class of the request, can be overridden
+                with `request_priority`.
 
         Returns:
         -------
@@ -70,6 +214,10 @@ class Autarco:
         Raises:
         ------
             AutarcoAuthenticationError: If the email or password is invalid.
+            AutarcoRequestDroppedError: The request scheduler dropped the
+                request, as it could no longer finish in time.
+            AutarcoCircuitOpenError: The circuit breaker of the endpoint is
+                open after repeated failures.
             AutarcoConnectionError: An error occurred while communicating
                 with the Autarco API.
             AutarcoConnectionTimeoutError: A timeout occurred while communicating
@@ -77,6 +225,285 @@ class Autarco:
             AutarcoError: Received an unexpected response from the
                 Autarco API.
 
+        """
+        breaker = self._get_breaker(uri)
+        if breaker is not None and not breaker.allow():
+            msg = f"Circuit breaker for {_endpoint(uri)} is open"
+            raise AutarcoCircuitOpenError(msg)
+
+        failed: bool | None = None
+        try:
+            async with self._slot(uri, params, priority) as timeout:
+                text = await self._fetch(
+                    uri,
+                    method=method,
+                    params=params,
+                    request_timeout=timeout,
+                    priority=priority,
+                )
+            failed = False
+        except AutarcoRequestDroppedError:
+            raise
+        except AutarcoError as exception:
+            failed = _is_failure(exception)
+            raise
+        finally:
+            if breaker is not None:
+                breaker.record(failed=failed)
+        return text
+
+    def _timeout(self, uri: str, params: dict[str, Any] | None = None) -> float:
+        """Get the timeout of a request.
+
+        A timeout set with `timeout_override` always wins. With adaptive
+        `timeouts`, the timeout follows the observed latency percentile of the
+        endpoint template and range, within the minimum and maximum. Until
+        enough requests have been observed, `request_timeout` is used, kept
+        within the same bounds.
+
+        Args:
+        ----
+            uri: Request URI, without '/', for example, 'status'.
+            params: Query parameters sent with the request.
+
+        Returns:
+        -------
+            The timeout in seconds.
+
+        """
+        if (override := current_timeout_override()) is not None:
+            return override
+        if (timeouts := self.timeouts) is None:
+            return self.request_timeout
+        observed = self.latency.percentile(
+            _latency_key(uri, params), timeouts.percentile
+        )
+        timeout = (
+            self.request_timeout if observed is None else observed * timeouts.multiplier
+        )
+        return min(timeouts.maximum, max(timeouts.minimum, timeout))
+
+    @asynccontextmanager
+    async def _slot(
+        self, uri: str, params: dict[str, Any] | None, priority: Priority
+    ) -> AsyncIterator[float]:
+        """Wait for the request scheduler and limiter, if configured.
+
+        Args:
+        ----
+            uri: Request URI, without '/', for example, 'status'.
+            params: Query parameters sent with the request.
+            priority: The priority class of the request.
+
+        Yields:
+        ------
+            The time left for the request, after waiting for a slot.
+
+        """
+        loop = asyncio.get_running_loop()
+        timeout = self._timeout(uri, params)
+        deadline = loop.time() + timeout
+        async with AsyncExitStack() as stack:
+            if self.request_scheduler is not None:
+                await stack.enter_async_context(
+                    self.request_scheduler.slot(current_priority(priority), deadline)
+                )
+            if self.limiter is not None:
+                await stack.enter_async_context(self.limiter.slot(self.email))
+            if self.request_scheduler is None:
+                yield timeout
+            else:
+                yield deadline - loop.time()
+
+    def _try_slot(self, priority: Priority) -> Callable[[], None] | None:
+        """Take a slot of the request scheduler and limiter without waiting.
+
+        Args:
+        ----
+            priority: The priority class of the request.
+
+        Returns:
+        -------
+            A function that releases the slot, or None if no slot is free.
+
+        """
+        priority = current_priority(priority)
+        scheduler, limiter = self.request_scheduler, self.limiter
+        if scheduler is not None and not scheduler.try_acquire(priority):
+            return None
+        if limiter is not None and not limiter.try_acquire():
+            if scheduler is not None:
+                scheduler.release(priority)
+            return None
+
+        def release() -> None:
+            if limiter is not None:
+                limiter.release()
+            if scheduler is not None:
+                scheduler.release(priority)
+
+        return release
+
+    async def _hedge(
+        self,
+        uri: str,
+        *,
+        method: str,
+        params: dict[str, Any] | None,
+        request_timeout: float,
+        release: Callable[[], None],
+    ) -> str:
+        """Send a hedge request, holding its own slot until it is done."""
+        try:
+            return await self._timed_send(
+                uri, method=method, params=params, request_timeout=request_timeout
+            )
+        finally:
+            release()
+
+    async def _fetch(
+        self,
+        uri: str,
+        *,
+        method: str,
+        params: dict[str, Any] | None,
+        request_timeout: float,
+        priority: Priority = Priority.INTERACTIVE,
+    ) -> str:
+        """Send a request, hedged with a second request when it is slow.
+
+        When hedging is enabled, a GET request that has not been answered by
+        the observed latency percentile of its endpoint template is sent a
+        second time. The hedge takes its own slot of the request scheduler
+        and limiter, and is skipped when none is free. The first successful
+        response wins and the other request is cancelled.
+
+        Args:
+        ----
+            uri: Request URI, without '/', for example, 'status'.
+            method: HTTP method to use.
+            params: Query parameters to send with the request.
+            request_timeout: Timeout in seconds for the request.
+            priority: The priority class of the request.
+
+        Returns:
+        -------
+            The response data from the Autarco API.
+
+        """
+        delay = None
+        if self.hedging is not None and method == METH_GET:
+            self.hedge_stats.requests += 1
+            delay = self.latency.percentile(
+                _latency_key(uri, params), self.hedging.percentile
+            )
+        if delay is None or delay >= request_timeout:
+            return await self._timed_send(
+                uri, method=method, params=params, request_timeout=request_timeout
+            )
+
+        started = time.monotonic()
+        primary = asyncio.create_task(
+            self._timed_send(
+                uri, method=method, params=params, request_timeout=request_timeout
+            )
+        )
+        hedge: asyncio.Task[str] | None = None
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+            if done or not self.hedge_stats.allow():
+                return await primary
+            if (release := self._try_slot(priority)) is None:
+                self.hedge_stats.no_slot += 1
+                return await primary
+            self.hedge_stats.hedged += 1
+            hedge = asyncio.create_task(
+                self._hedge(
+                    uri,
+                    method=method,
+                    params=params,
+                    request_timeout=request_timeout - delay,
+                    release=release,
+                )
+            )
+            pending: set[asyncio.Task[str]] = {primary, hedge}
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                # Retrieve every error, also of a failed request that lost.
+                if succeeded := [task for task in done if task.exception() is None]:
+                    if succeeded[0] is hedge:
+                        self.hedge_stats.hedge_wins += 1
+                        # The cancelled primary took at least this long.
+                        self.latency.record(
+                            _latency_key(uri, params), time.monotonic() - started
+                        )
+                    return succeeded[0].result()
+            # Both requests failed, report the error of the first one.
+            return primary.result()
+        finally:
+            primary.cancel()
+            if hedge is not None:
+                hedge.cancel()
+
+    async def _timed_send(
+        self,
+        uri: str,
+        *,
+        method: str,
+        params: dict[str, Any] | None,
+        request_timeout: float,
+    ) -> str:
+        """Send a single HTTP request and record its latency.
+
+        A request that times out is recorded with the time it took, as a lower
+        bound of its latency, so the adaptive timeout can grow again when the
+        endpoint gets slower.
+        """
+        started = time.monotonic()
+        try:
+            text = await self._send(
+                uri, method=method, params=params, request_timeout=request_timeout
+            )
+        except AutarcoConnectionError as exception:
+            if isinstance(exception.__cause__, TimeoutError):
+                self.latency.record(
+                    _latency_key(uri, params), time.monotonic() - started
+                )
+            raise
+        self.latency.record(_latency_key(uri, params), time.monotonic() - started)
+        return text
+
+    async def _send(
+        self,
+        uri: str,
+        *,
+        method: str,
+        params: dict[str, Any] | None,
+        request_timeout: float,
+    ) -> str:
+        """Send a single HTTP request to the Autarco API.
+
+        Args:
+        ----
+            uri: Request URI, without '/', for example, 'status'.
+            method: HTTP method to use.
+            params: Query parameters to send with the request.
+            request_timeout: Timeout in seconds for the request.
+
+        Returns:
+        -------
+            The response data from the Autarco API.
+
+        Raises:
+        ------
+            AutarcoAuthenticationError: If the email or password is invalid.
+            AutarcoConnectionError: An error occurred while communicating
+                with the Autarco API.
+            AutarcoError: Received an unexpected response from the
+                Autarco API.
+
         """
         url = URL.build(
             scheme="https",
@@ -97,7 +524,7 @@ class Autarco:
         auth = BasicAuth(self.email, self.password)
 
         try:
-            async with asyncio.timeout(self.request_timeout):
+            async with asyncio.timeout(request_timeout):
                 response = await self.session.request(
                     method,
                     url,
@@ -131,6 +558,61 @@ class Autarco:
 
         return text
 
+    def _get_breaker(self, uri: str) -> CircuitBreaker | None:
+        """Get the circuit breaker of a site endpoint, if enabled.
+
+        Args:
+        ----
+            uri: Request URI, without '/', for example, 'status'.
+
+        Returns:
+        -------
+            The CircuitBreaker object, or None when disabled.
+
+        """
+        if self.breaker is None:
+            return None
+        key = _endpoint(uri)
+        if key not in self._breakers:
+            self._breakers[key] = CircuitBreaker(
+                failure_threshold=self.breaker.threshold,
+                reset_timeout=self.breaker.reset_timeout,
+            )
+        return self._breakers[key]
+
+    @property
+    def breaker_states(self) -> dict[tuple[str, str], BreakerState]:
+        """Return the state of every circuit breaker.
+
+        Returns
+        -------
+            A dictionary keyed by (public_key, endpoint template).
+
+        """
+        return {key: breaker.state for key, breaker in self._breakers.items()}
+
+    async def _parse[T](self, parser: Callable[[str], T], response: str) -> T:
+        """Parse a response, off the event loop when it is large.
+
+        With `offload`, responses of at least its threshold in characters are
+        parsed in its executor, or the default executor of the event loop, so
+        building the models does not block other coroutines.
+
+        Args:
+        ----
+            parser: The function building the models from the response.
+            response: The response data from the Autarco API.
+
+        Returns:
+        -------
+            The parsed models.
+
+        """
+        if self.offload is None or len(response) < self.offload.threshold:
+            return parser(response)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.offload.executor, parser, response)
+
     async def _get_combined_data(self, public_key: str) -> dict[str, Any]:
         """Get a combined dictionary with power and energy data from a site.
 
@@ -156,7 +638,7 @@ class Autarco:
 
         """
         response = await self._request("")
-        return AccountResponse.from_json(response).sites
+        return (await self._parse(AccountResponse.from_json, response)).sites
 
     async def get_inverters(self, public_key: str) -> dict[str, Inverter]:
         """Get a list of all used inverters.
@@ -171,7 +653,7 @@ class Autarco:
 
         """
         response = await self._request(f"{public_key}/power")
-        return PowerResponse.from_json(response).inverters
+        return (await self._parse(PowerResponse.from_json, response)).inverters
 
     async def get_power_statistics(
         self, public_key: str, query_range: str = "day"
@@ -188,8 +670,19 @@ class Autarco:
             A list of Inverter objects.
 
         """
-        response = await self._request(f"{public_key}/power", params={"r": query_range})
-        return PowerResponse.from_json(response).stats
+        response = await self._request(
+            f"{public_key}/power",
+            params={"r": query_range},
+            priority=Priority.BACKGROUND,
+        )
+        stats = (await self._parse(PowerResponse.from_json, response)).stats
+        if (
+            self.local_energy is not None
+            and query_range == "day"
+            and (day := _curve_date(stats)) is not None
+        ):
+            self._day_power[public_key] = (day, stats)
+        return stats
 
     async def get_energy_statistics(
         self, public_key: str, query_range: str = "month"
@@ -207,9 +700,11 @@ class Autarco:
 
         """
         response = await self._request(
-            f"{public_key}/energy", params={"r": query_range}
+            f"{public_key}/energy",
+            params={"r": query_range},
+            priority=Priority.BACKGROUND,
         )
-        return EnergyResponse.from_json(response).stats
+        return (await self._parse(EnergyResponse.from_json, response)).stats
 
     async def get_solar(self, public_key: str) -> Solar:
         """Get information about the solar production from a site.
@@ -224,7 +719,61 @@ class Autarco:
 
         """
         combined_data = await self._get_combined_data(public_key)
-        return Solar.from_dict(combined_data)
+        solar = Solar.from_dict(combined_data)
+        self._check_local_energy(public_key, solar.energy_production_today)
+        return solar
+
+    async def get_energy_today(self, public_key: str) -> float:
+        """Get the energy production of today from a site.
+
+        With `local_energy`, the energy is integrated from the last power
+        statistics of the day range, saving a request. Otherwise, or when
+        those are not available or from an earlier day, it is requested from
+        the API. The day of the samples is compared with today in the
+        timezone of the site, once known from `get_site`, and in the timezone
+        of the host before.
+
+        Args:
+        ----
+            public_key: The public key from your site.
+
+        Returns:
+        -------
+            The energy production of today in kWh.
+
+        """
+        if (stats := self._today_power(public_key)) is not None:
+            return sum(stats.integrate_power().values())
+        response = await self._request(f"{public_key}/kpis/energy")
+        return float(json.loads(response)["pv_today"])
+
+    def _today_power(self, public_key: str) -> Stats | None:
+        """Get the power statistics of today, dropping those of earlier days."""
+        if (cached := self._day_power.get(public_key)) is None:
+            return None
+        day, stats = cached
+        if day != _site_date(self._timezones.get(public_key)):
+            del self._day_power[public_key]
+            return None
+        return stats
+
+    def _check_local_energy(self, public_key: str, energy_today: float) -> None:
+        """Validate the locally integrated energy against the API.
+
+        When the difference is larger than the `local_energy` tolerance, the
+        cached power statistics of the site are dropped, so the energy is
+        requested from the API until new power statistics arrive.
+        """
+        stats = self._today_power(public_key)
+        if stats is None:
+            return
+        local = sum(stats.integrate_power().values())
+        if (
+            self.local_energy is None
+            or abs(local - energy_today) > self.local_energy.tolerance
+        ):
+            del self._day_power[public_key]
+            self.energy_mismatches += 1
 
     async def get_site(self, public_key: str) -> Site:
         """Get information about your system site.
@@ -245,7 +794,9 @@ class Autarco:
             **json.loads(site_response),
             **json.loads(energy_response),
         }
-        return Site.from_json(json.dumps(combined))
+        site = Site.from_json(json.dumps(combined))
+        self._timezones[public_key] = site.timezone
+        return site
 
     async def get_battery(self, public_key: str) -> Battery:
         """Get information about the battery from a site.
@@ -262,10 +813,93 @@ class Autarco:
         combined_data = await self._get_combined_data(public_key)
         return Battery.from_dict(combined_data)
 
+    async def _get_snapshot(self, public_key: str) -> Snapshot:
+        """Get the solar and, if present, battery data of a site at once.
+
+        Args:
+        ----
+            public_key: The public key from your site.
+
+        Returns:
+        -------
+            A Snapshot object.
+
+        """
+        combined_data = await self._get_combined_data(public_key)
+        try:
+            battery: Battery | None = Battery.from_dict(combined_data)
+        except MissingField:
+            battery = None
+        return Snapshot(
+            public_key=public_key,
+            solar=Solar.from_dict(combined_data),
+            battery=battery,
+            fetched_at=asyncio.get_running_loop().time(),
+        )
+
+    def stream(
+        self,
+        sites: list[str],
+        *,
+        interval: float = 60.0,
+        maxsize: int = 100,
+        overflow: OverflowPolicy = OverflowPolicy.BLOCK,
+    ) -> SnapshotStream:
+        """Stream live snapshots of the sites.
+
+        Args:
+        ----
+            sites: The public keys of the sites to poll.
+            interval: The polling interval per site in seconds.
+            maxsize: The maximum number of buffered snapshots.
+            overflow: The policy when the consumer falls behind.
+
+        Returns:
+        -------
+            A SnapshotStream, to be used with `async for`.
+
+        """
+        return SnapshotStream(
+            self._get_snapshot,
+            sites,
+            interval=interval,
+            maxsize=maxsize,
+            overflow=overflow,
+        )
+
+    async def warm_up(self, connections: int = 4) -> list[AccountSite]:
+        """Prepare the client for the first poll.
+
+        Sends concurrent account requests, so that many connections are
+        opened and kept in the pool, and the credentials are validated. With
+        `local_energy`, the power statistics of all sites are fetched in
+        parallel as well.
+
+        Args:
+        ----
+            connections: The number of connections to open.
+
+        Returns:
+        -------
+            A list of Site objects.
+
+        """
+        responses = await asyncio.gather(
+            *(self._request("") for _ in range(max(1, connections)))
+        )
+        sites = (await self._parse(AccountResponse.from_json, responses[0])).sites
+        if self.local_energy is not None:
+            await asyncio.gather(
+                *(self.get_power_statistics(site.public_key) for site in sites)
+            )
+        return sites
+
     async def close(self) -> None:
         """Close open client session."""
         if self.session and self._close_session:
             await self.session.close()
+        if self.profiler is not None:
+            self.profiler.stop()
 
     async def __aenter__(self) -> Self:
         """Async enter.
@@ -274,7 +908,18 @@ class Autarco:
         -------
             The Autarco object.
 
+        Raises
+        ------
+            AutarcoAuthenticationError: The warm-up found the email or
+                password invalid.
+
         """
+        if self.warm_up_connections:
+            try:
+                await self.warm_up(self.warm_up_connections)
+            except BaseException:
+                await self.close()
+                raise
         return self
 
     async def __aexit__(self, *_exc_info: object) -> None:
@@ -0,0 +1,79 @@
+"""Circuit breaker for the Autarco API."""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from enum import StrEnum
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+
+class BreakerState(StrEnum):
+    """Enumeration representing the state of a circuit breaker."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+@dataclass
+class CircuitBreaker:
+    """Fail fast on an endpoint after repeated connection failures.
+
+    The breaker opens after `failure_threshold` consecutive failures. While
+    open, requests are refused until `reset_timeout` has passed, after which
+    a single probe request is let through (half-open). A successful probe
+    closes the breaker again, a failed probe opens it for another period.
+    """
+
+    failure_threshold: int = 5
+    reset_timeout: float = 30.0
+    clock: Callable[[], float] = time.monotonic
+
+    state: BreakerState = BreakerState.CLOSED
+    failures: int = 0
+    opened_at: float | None = None
+    _probing: bool = False
+
+    def allow(self) -> bool:
+        """Return True if a request may be sent."""
+        if self.state is BreakerState.CLOSED:
+            return True
+        if self.state is BreakerState.OPEN:
+            if self.opened_at is not None and (
+                self.clock() - self.opened_at < self.reset_timeout
+            ):
+                return False
+            self.state = BreakerState.HALF_OPEN
+        if self._probing:
+            return False
+        self._probing = True
+        return True
+
+    def record(self, *, failed: bool | None) -> None:
+        """Record the outcome of an allowed request.
+
+        Args:
+        ----
+            failed: True on a connection failure, False when the API responded,
+                or None when the request was cancelled before either.
+
+        """
+        self._probing = False
+        if failed is None:
+            return
+        if not failed:
+            self.state = BreakerState.CLOSED
+            self.failures = 0
+            self.opened_at = None
+            return
+        self.failures += 1
+        if (
+            self.state is BreakerState.HALF_OPEN
+            or self.failures >= self.failure_threshold
+        ):
+            self.state = BreakerState.OPEN
+            self.opened_at = self.clock()
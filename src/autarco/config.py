@@ -0,0 +1,70 @@
+"""Optional features of the Autarco client, configured per group."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from concurrent.futures import Executor
+
+
+@dataclass(frozen=True)
+class BreakerConfig:
+    """Object representing the circuit breaker settings of a client.
+
+    A breaker per site and endpoint opens after `threshold` consecutive
+    failures, and lets a probe request through after `reset_timeout`.
+    """
+
+    threshold: int = 5
+    reset_timeout: float = 30.0
+
+
+@dataclass(frozen=True)
+class HedgeConfig:
+    """Object representing the hedged request settings of a client.
+
+    A GET request that is not answered within the observed `percentile`
+    latency of its endpoint is sent a second time.
+    """
+
+    percentile: float = 95.0
+
+
+@dataclass(frozen=True)
+class TimeoutConfig:
+    """Object representing the adaptive timeout settings of a client.
+
+    The timeout follows the observed `percentile` latency of an endpoint,
+    multiplied by `multiplier` and kept between `minimum` and `maximum`.
+    """
+
+    percentile: float = 99.0
+    multiplier: float = 3.0
+    minimum: float = 2.0
+    maximum: float = 60.0
+
+
+@dataclass(frozen=True)
+class OffloadConfig:
+    """Object representing the parse offloading settings of a client.
+
+    Responses of at least `threshold` characters are parsed in `executor`,
+    or the default executor of the event loop.
+    """
+
+    threshold: int = 200_000
+    executor: Executor | None = None
+
+
+@dataclass(frozen=True)
+class LocalEnergyConfig:
+    """Object representing the local energy settings of a client.
+
+    Today's energy is integrated from the last power curve of a site, and
+    the curve is dropped when it differs more than `tolerance` kWh from the
+    energy reported by the API.
+    """
+
+    tolerance: float = 1.0
@@ -0,0 +1,130 @@
+"""Change detection between polls of the Autarco API."""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from dataclasses import dataclass, field, fields
+from functools import cache
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from _typeshed import DataclassInstance
+
+    from .models import Inverter
+
+
+@cache
+def _field_names(cls: type[DataclassInstance]) -> tuple[str, ...]:
+    """Get the field names of a model class, cached per class."""
+    return tuple(item.name for item in fields(cls))
+
+
+@dataclass
+class Delta:
+    """Object representing the changed fields of a model between two polls."""
+
+    public_key: str
+    model: str
+    key: str | None
+    changes: dict[str, Any]
+    previous: dict[str, Any]
+    is_new: bool = False
+
+
+@dataclass
+class SnapshotDiffer:
+    """Keep the previous snapshot per site and emit only what changed.
+
+    Snapshots are kept in a bounded LRU store, the least recently updated
+    snapshot is evicted once `max_snapshots` is reached. An evicted snapshot
+    is reported as new the next time it is seen.
+    """
+
+    max_snapshots: int = 4096
+
+    _snapshots: OrderedDict[tuple[str, str, str | None], Any] = field(
+        default_factory=OrderedDict
+    )
+
+    def __len__(self) -> int:
+        """Return the number of stored snapshots."""
+        return len(self._snapshots)
+
+    def diff(self, public_key: str, obj: Any, key: str | None = None) -> Delta | None:
+        """Compare a model object with the previous snapshot of the site.
+
+        Args:
+        ----
+            public_key: The public key from the site.
+            obj: The model object, for example a Solar object.
+            key: Optional key to tell apart objects of the same model within
+                a site, for example the inverter id.
+
+        Returns:
+        -------
+            A Delta object, or None if nothing changed.
+
+        """
+        model = type(obj).__name__
+        store_key = (public_key, model, key)
+        previous = self._snapshots.get(store_key)
+        self._snapshots[store_key] = obj
+        self._snapshots.move_to_end(store_key)
+        if len(self._snapshots) > self.max_snapshots:
+            self._snapshots.popitem(last=False)
+
+        # Cheap equality check first, the dataclass compares all fields at once.
+        if previous is not None and previous == obj:
+            return None
+
+        changes: dict[str, Any] = {}
+        old: dict[str, Any] = {}
+        for name in _field_names(type(obj)):
+            value = getattr(obj, name)
+            if previous is None:
+                changes[name] = value
+                continue
+            old_value = getattr(previous, name)
+            if old_value != value:
+                changes[name] = value
+                old[name] = old_value
+        return Delta(
+            public_key=public_key,
+            model=model,
+            key=key,
+            changes=changes,
+            previous=old,
+            is_new=previous is None,
+        )
+
+    def diff_inverters(
+        self, public_key: str, inverters: dict[str, Inverter]
+    ) -> list[Delta]:
+        """Compare all inverters of a site with their previous snapshots.
+
+        Args:
+        ----
+            public_key: The public key from the site.
+            inverters: The inverters as returned by `get_inverters`.
+
+        Returns:
+        -------
+            A list of Delta objects for the changed inverters.
+
+        """
+        return [
+            delta
+            for inverter_id, inverter in inverters.items()
+            if (delta := self.diff(public_key, inverter, inverter_id)) is not None
+        ]
+
+    def forget(self, public_key: str) -> None:
+        """Drop all snapshots of a site.
+
+        Args:
+        ----
+            public_key: The public key from the site.
+
+        """
+        for store_key in [key for key in self._snapshots if key[0] == public_key]:
+            del self._snapshots[store_key]
@@ -11,3 +11,11 @@ class AutarcoConnectionError(AutarcoError):
 
 class AutarcoAuthenticationError(AutarcoError):
     """Autarco Authentication exception."""
+
+
+class AutarcoCircuitOpenError(AutarcoConnectionError):
+    """Autarco circuit breaker open exception."""
+
+
+class AutarcoRequestDroppedError(AutarcoError):
+    """Autarco request dropped exception."""
@@ -0,0 +1,252 @@
+"""Streaming export of Autarco statistics."""
+
+from __future__ import annotations
+
+import csv
+import importlib
+from datetime import datetime
+from itertools import chain, islice
+from typing import IO, TYPE_CHECKING, Any, NamedTuple
+
+import orjson
+
+from .exceptions import AutarcoError
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+    from datetime import date
+    from pathlib import Path
+
+    from .models import Stats
+
+GRAPHS: tuple[str, ...] = ("pv_power", "pv_energy")
+FIELDS: tuple[str, ...] = ("site", "inverter", "timestamp", "value")
+
+
+class StatsRow(NamedTuple):
+    """Object representing a single sample of an inverter graph."""
+
+    site: str
+    inverter: str
+    timestamp: datetime | date
+    value: int | None
+
+
+def iter_rows(
+    public_key: str, stats: Stats, graph: str = "pv_power"
+) -> Iterator[StatsRow]:
+    """Stream the samples of a graph straight from a Stats object.
+
+    Args:
+    ----
+        public_key: The public key from the site.
+        stats: The Stats object, from the power or energy statistics.
+        graph: The graph to export, 'pv_power' or 'pv_energy'.
+
+    Yields:
+    ------
+        A StatsRow for every sample of every inverter.
+
+    Raises:
+    ------
+        ValueError: If an unknown graph is given.
+
+    """
+    if graph not in GRAPHS:
+        msg = f"Unknown graph: {graph}"
+        raise ValueError(msg)
+    for inverter_id, series in (getattr(stats.graphs, graph) or {}).items():
+        for timestamp, value in series.items():
+            yield StatsRow(public_key, inverter_id, timestamp, value)
+
+
+def iter_fleet_rows(
+    fleet: Iterable[tuple[str, Stats]], graph: str = "pv_power"
+) -> Iterator[StatsRow]:
+    """Stream the samples of a graph for many sites.
+
+    The Stats objects are consumed one by one, so a generator that fetches
+    the statistics per site keeps only a single site in memory.
+
+    Args:
+    ----
+        fleet: Pairs of the public key and Stats object of every site.
+        graph: The graph to export, 'pv_power' or 'pv_energy'.
+
+    Yields:
+    ------
+        A StatsRow for every sample of every inverter of every site.
+
+    """
+    for public_key, stats in fleet:
+        yield from iter_rows(public_key, stats, graph)
+
+
+def _batched(rows: Iterable[StatsRow], size: int) -> Iterator[list[StatsRow]]:
+    """Split the rows into lists of at most `size` rows."""
+    iterator = iter(rows)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def write_ndjson(
+    rows: Iterable[StatsRow], fp: IO[bytes], *, batch_size: int = 10_000
+) -> int:
+    """Write the rows as newline-delimited JSON.
+
+    Args:
+    ----
+        rows: The rows to export.
+        fp: A binary file object to write to.
+        batch_size: The number of rows encoded per write.
+
+    Returns:
+    -------
+        The number of written rows.
+
+    """
+    count = 0
+    for batch in _batched(rows, batch_size):
+        fp.write(
+            b"".join(
+                orjson.dumps(row._asdict(), option=orjson.OPT_APPEND_NEWLINE)
+                for row in batch
+            )
+        )
+        count += len(batch)
+    return count
+
+
+def write_csv(
+    rows: Iterable[StatsRow], fp: IO[str], *, batch_size: int = 10_000
+) -> int:
+    """Write the rows as CSV, with a header row.
+
+    Args:
+    ----
+        rows: The rows to export.
+        fp: A text file object to write to, opened with `newline=""`.
+        batch_size: The number of rows written per write.
+
+    Returns:
+    -------
+        The number of written rows.
+
+    """
+    writer = csv.writer(fp)
+    writer.writerow(FIELDS)
+    count = 0
+    for batch in _batched(rows, batch_size):
+        writer.writerows(
+            (site, inverter, timestamp.isoformat(), "" if value is None else value)
+            for site, inverter, timestamp, value in batch
+        )
+        count += len(batch)
+    return count
+
+
+def _import(name: str) -> Any:
+    """Import a pyarrow module, only when it is used.
+
+    Raises
+    ------
+        AutarcoError: If pyarrow is not installed.
+
+    """
+    try:
+        return importlib.import_module(name)
+    except ImportError as exception:
+        msg = "The pyarrow package is required to export to Arrow or Parquet"
+        raise AutarcoError(msg) from exception
+
+
+def _arrow_batches(
+    rows: Iterable[StatsRow], batch_size: int
+) -> tuple[Any, Iterator[Any]]:
+    """Get the Arrow schema and a generator of record batches.
+
+    The type of the timestamp column follows the first row, timestamps for
+    power graphs and dates for energy graphs.
+    """
+    pa = _import("pyarrow")
+    iterator = iter(rows)
+    first = next(iterator, None)
+    dates = first is not None and not isinstance(first.timestamp, datetime)
+    schema = pa.schema(
+        [
+            ("site", pa.string()),
+            ("inverter", pa.string()),
+            ("timestamp", pa.date32() if dates else pa.timestamp("s")),
+            ("value", pa.int64()),
+        ]
+    )
+
+    def batches() -> Iterator[Any]:
+        remaining = iterator if first is None else chain((first,), iterator)
+        for batch in _batched(remaining, batch_size):
+            yield pa.RecordBatch.from_arrays(
+                [pa.array(column) for column in zip(*batch, strict=True)],
+                schema=schema,
+            )
+
+    return schema, batches()
+
+
+def write_arrow(
+    rows: Iterable[StatsRow],
+    sink: str | Path | IO[bytes],
+    *,
+    batch_size: int = 10_000,
+) -> int:
+    """Write the rows as an Arrow IPC stream, requires pyarrow.
+
+    Args:
+    ----
+        rows: The rows to export.
+        sink: A path or binary file object to write to.
+        batch_size: The number of rows per record batch.
+
+    Returns:
+    -------
+        The number of written rows.
+
+    """
+    schema, batches = _arrow_batches(rows, batch_size)
+    ipc = _import("pyarrow.ipc")
+
+    count = 0
+    with ipc.new_stream(sink, schema) as writer:
+        for batch in batches:
+            writer.write_batch(batch)
+            count += batch.num_rows
+    return count
+
+
+def write_parquet(
+    rows: Iterable[StatsRow],
+    sink: str | Path | IO[bytes],
+    *,
+    batch_size: int = 10_000,
+) -> int:
+    """Write the rows as a Parquet file, requires pyarrow.
+
+    Args:
+    ----
+        rows: The rows to export.
+        sink: A path or binary file object to write to.
+        batch_size: The number of rows per record batch.
+
+    Returns:
+    -------
+        The number of written rows.
+
+    """
+    schema, batches = _arrow_batches(rows, batch_size)
+    parquet = _import("pyarrow.parquet")
+
+    count = 0
+    with parquet.ParquetWriter(sink, schema) as writer:
+        for batch in batches:
+            writer.write_batch(batch)
+            count += batch.num_rows
+    return count
@@ -0,0 +1,113 @@
+"""Latency tracking for the Autarco API."""
+
+from __future__ import annotations
+
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+from .aggregation import percentile
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+_TIMEOUT: ContextVar[float | None] = ContextVar("autarco_timeout", default=None)
+
+
+@contextmanager
+def timeout_override(seconds: float) -> Iterator[None]:
+    """Use a fixed timeout for all requests within the context.
+
+    Args:
+    ----
+        seconds: The timeout, overriding the (adaptive) timeout of the client.
+
+    """
+    token = _TIMEOUT.set(seconds)
+    try:
+        yield
+    finally:
+        _TIMEOUT.reset(token)
+
+
+def current_timeout_override() -> float | None:
+    """Get the timeout set by `timeout_override`, if any."""
+    return _TIMEOUT.get()
+
+
+@dataclass
+class LatencyTracker:
+    """Track the latency of the most recent requests per endpoint template."""
+
+    window: int = 200
+    min_samples: int = 20
+
+    _samples: dict[str, deque[float]] = field(default_factory=dict)
+
+    def record(self, template: str, seconds: float) -> None:
+        """Record the latency of a successful request.
+
+        Args:
+        ----
+            template: The endpoint template, for example '{public_key}/power'.
+            seconds: The duration of the request.
+
+        """
+        if template not in self._samples:
+            self._samples[template] = deque(maxlen=self.window)
+        self._samples[template].append(seconds)
+
+    def percentile(self, template: str, q: float) -> float | None:
+        """Get a latency percentile of an endpoint template.
+
+        Args:
+        ----
+            template: The endpoint template, for example '{public_key}/power'.
+            q: The percentile to calculate, between 0 and 100.
+
+        Returns:
+        -------
+            The latency in seconds, or None with less than `min_samples`.
+
+        """
+        samples = self._samples.get(template)
+        if samples is None or len(samples) < self.min_samples:
+            return None
+        return percentile(sorted(samples), q)
+
+    def snapshot(
+        self, percentiles: tuple[float, ...] = (50.0, 95.0, 99.0)
+    ) -> dict[str, dict[float, float]]:
+        """Get the latency percentiles of all endpoint templates.
+
+        Args:
+        ----
+            percentiles: The percentiles to calculate.
+
+        Returns:
+        -------
+            A dictionary with the percentiles per endpoint template.
+
+        """
+        result: dict[str, dict[float, float]] = {}
+        for template, samples in self._samples.items():
+            ordered = sorted(samples)
+            result[template] = {q: percentile(ordered, q) for q in percentiles}
+        return result
+
+
+@dataclass
+class HedgeStats:
+    """Object representing the metrics of hedged requests."""
+
+    max_rate: float = 0.1
+    requests: int = 0
+    hedged: int = 0
+    hedge_wins: int = 0
+    no_slot: int = 0
+
+    def allow(self) -> bool:
+        """Return True if another request may be hedged within the rate cap."""
+        return self.hedged < self.max_rate * self.requests
@@ -0,0 +1,195 @@
+"""Bulk conversion of series timestamps to the local time of a site."""
+
+from __future__ import annotations
+
+import bisect
+import itertools
+import math
+from array import array
+from datetime import UTC, date, datetime
+from functools import cache
+from zoneinfo import ZoneInfo
+
+from . import _compat
+from .series import Series, _array
+
+_DAY = 86400
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+class LocalTime:
+    """Convert columns of epoch timestamps to the local time of a timezone.
+
+    The UTC offset transitions are looked up once per year and cached, so
+    a whole column is converted by adding the offset of its period, instead
+    of calling `astimezone` per timestamp.
+    """
+
+    def __init__(self, timezone: str) -> None:
+        """Initialize the converter.
+
+        Args:
+        ----
+            timezone: The IANA timezone, for example 'Europe/Amsterdam'.
+
+        """
+        self.zone = ZoneInfo(timezone)
+        self._years: dict[int, tuple[list[float], list[float]]] = {}
+
+    def _offset(self, timestamp: float) -> float:
+        """Get the UTC offset in seconds at a timestamp."""
+        offset = datetime.fromtimestamp(timestamp, self.zone).utcoffset()
+        return offset.total_seconds() if offset is not None else 0.0
+
+    def _year(self, year: int) -> tuple[list[float], list[float]]:
+        """Get the UTC offset transitions of a year, starting at its begin."""
+        if year in self._years:
+            return self._years[year]
+        start = datetime(year, 1, 1, tzinfo=UTC).timestamp()
+        end = datetime(year + 1, 1, 1, tzinfo=UTC).timestamp()
+        starts, offsets = [start], [self._offset(start)]
+        moment = start
+        while moment < end:
+            # Timezones change their offset at most once per day.
+            following = min(moment + _DAY, end)
+            if self._offset(following) != offsets[-1]:
+                before, after = moment, following
+                while after - before > 1:
+                    middle = (before + after) // 2
+                    if self._offset(middle) == offsets[-1]:
+                        before = middle
+                    else:
+                        after = middle
+                starts.append(after)
+                offsets.append(self._offset(after))
+            moment = following
+        self._years[year] = (starts, offsets)
+        return starts, offsets
+
+    def _table(self, first: float, last: float) -> tuple[list[float], list[float]]:
+        """Get the UTC offset transitions between two timestamps."""
+        starts: list[float] = []
+        offsets: list[float] = []
+        for year in range(
+            datetime.fromtimestamp(first, UTC).year,
+            datetime.fromtimestamp(last, UTC).year + 1,
+        ):
+            year_starts, year_offsets = self._year(year)
+            starts.extend(year_starts)
+            offsets.extend(year_offsets)
+        return starts, offsets
+
+    def to_local(self, timestamps: array[float]) -> array[float]:
+        """Convert epoch timestamps to local wall-clock time.
+
+        Args:
+        ----
+            timestamps: The seconds since the epoch, in UTC.
+
+        Returns:
+        -------
+            The local wall-clock time, as seconds since the epoch.
+
+        """
+        if not timestamps:
+            return array("d")
+        if (np := _compat.np) is not None:
+            column = np.frombuffer(timestamps, dtype=np.float64)
+            starts, offsets = self._table(float(column.min()), float(column.max()))
+            index = np.searchsorted(starts, column, side="right") - 1
+            return _array(column + np.asarray(offsets)[index])
+
+        starts, offsets = self._table(min(timestamps), max(timestamps))
+        return array(
+            "d",
+            [
+                timestamp + offsets[bisect.bisect_right(starts, timestamp) - 1]
+                for timestamp in timestamps
+            ],
+        )
+
+    def from_local(self, timestamps: array[float]) -> array[float]:
+        """Convert local wall-clock time to epoch timestamps.
+
+        The graphs of the API have naive timestamps in the local time of the
+        site. During the hour that repeats when DST ends, the later moment is
+        taken.
+
+        Args:
+        ----
+            timestamps: The local wall-clock time, as seconds since the epoch.
+
+        Returns:
+        -------
+            The seconds since the epoch, in UTC.
+
+        """
+        if not timestamps:
+            return array("d")
+        if (np := _compat.np) is not None:
+            column = np.frombuffer(timestamps, dtype=np.float64)
+            table = self._table(float(column.min()) - _DAY, float(column.max()) + _DAY)
+            starts, offsets = np.asarray(table[0]), np.asarray(table[1])
+            guess = column - offsets[np.searchsorted(starts, column, side="right") - 1]
+            return _array(
+                column - offsets[np.searchsorted(starts, guess, side="right") - 1]
+            )
+
+        starts, offsets = self._table(min(timestamps) - _DAY, max(timestamps) + _DAY)
+
+        def offset(moment: float) -> float:
+            return offsets[bisect.bisect_right(starts, moment) - 1]
+
+        return array(
+            "d", [moment - offset(moment - offset(moment)) for moment in timestamps]
+        )
+
+    def split_days(self, series: Series) -> dict[date, Series]:
+        """Bucket a series by local day, in a single pass.
+
+        Args:
+        ----
+            series: The series, sorted by time.
+
+        Returns:
+        -------
+            A dictionary with the part of the series per local day, the
+            timestamps stay in UTC.
+
+        """
+        local = self.to_local(series.timestamps)
+        if (np := _compat.np) is not None:
+            days = np.floor(np.frombuffer(local, dtype=np.float64) / _DAY)
+            bounds = [0, *(np.flatnonzero(np.diff(days)) + 1).tolist(), len(days)]
+            return {
+                date.fromordinal(int(days[start]) + _EPOCH_ORDINAL): Series(
+                    series.timestamps[start:end], series.values[start:end]
+                )
+                for start, end in itertools.pairwise(bounds)
+                if end > start
+            }
+
+        result: dict[date, Series] = {}
+        for timestamp, value, moment in zip(*series, local, strict=True):
+            day = date.fromordinal(math.floor(moment / _DAY) + _EPOCH_ORDINAL)
+            if day not in result:
+                result[day] = Series(array("d"), array("d"))
+            result[day].timestamps.append(timestamp)
+            result[day].values.append(value)
+        return result
+
+
+@cache
+def get_local_time(timezone: str) -> LocalTime:
+    """Get the shared converter of a timezone.
+
+    Args:
+    ----
+        timezone: The IANA timezone, for example 'Europe/Amsterdam'.
+
+    Returns:
+    -------
+        The LocalTime object, with the transitions cached across sites.
+
+    """
+    return LocalTime(timezone)
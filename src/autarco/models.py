@@ -3,7 +3,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, field
-from datetime import date, datetime
+from datetime import date, datetime, timedelta
 from typing import Any
 
 from mashumaro import DataClassDictMixin, field_options
@@ -11,6 +11,10 @@ from mashumaro.config import BaseConfig
 from mashumaro.mixins.orjson import DataClassORJSONMixin
 from mashumaro.types import SerializationStrategy
 
+from .aggregation import trapezoid
+from .localtime import LocalTime, get_local_time
+from .series import Series, average, lttb, minmax, to_series
+
 
 class DateStrategy(SerializationStrategy):
     """Date serialization strategy to handle the date format."""
@@ -135,6 +139,118 @@ class Stats(DataClassORJSONMixin):
             return power_stats_by_inverter
         return None
 
+    def integrate_power(self, max_gap: timedelta | None = None) -> dict[str, float]:
+        """Integrate the power graph into the energy per inverter.
+
+        Missing samples break the curve, the energy over such gaps is not
+        counted. With the day range, this gives the energy of today.
+
+        Args:
+        ----
+            max_gap: The longest interval between two samples to integrate.
+
+        Returns:
+        -------
+            A dictionary with the energy in kWh per inverter.
+
+        """
+        if not self.graphs.pv_power:
+            return {}
+        return {
+            inverter_id: trapezoid(list(power_data), list(power_data.values()), max_gap)
+            for inverter_id, power_data in self.graphs.pv_power.items()
+        }
+
+    def power_series(self) -> dict[str, Series]:
+        """Get the power graph per inverter as compact arrays.
+
+        Returns
+        -------
+            A dictionary with a Series object per inverter.
+
+        """
+        if not self.graphs.pv_power:
+            return {}
+        return {
+            inverter_id: to_series(power_data)
+            for inverter_id, power_data in self.graphs.pv_power.items()
+        }
+
+    def lttb(self, threshold: int) -> dict[str, Series]:
+        """Downsample the power graph with Largest-Triangle-Three-Buckets.
+
+        Args:
+        ----
+            threshold: The number of samples to keep per inverter.
+
+        Returns:
+        -------
+            A dictionary with a Series object per inverter.
+
+        """
+        return {
+            inverter_id: lttb(series, threshold)
+            for inverter_id, series in self.power_series().items()
+        }
+
+    def minmax(self, buckets: int) -> dict[str, Series]:
+        """Downsample the power graph to the minimum and maximum per bucket.
+
+        Args:
+        ----
+            buckets: The number of buckets per inverter.
+
+        Returns:
+        -------
+            A dictionary with a Series object per inverter.
+
+        """
+        return {
+            inverter_id: minmax(series, buckets)
+            for inverter_id, series in self.power_series().items()
+        }
+
+    def average(self, interval: timedelta) -> dict[str, Series]:
+        """Downsample the power graph to the mean over fixed intervals.
+
+        Args:
+        ----
+            interval: The length of the intervals.
+
+        Returns:
+        -------
+            A dictionary with a Series object per inverter.
+
+        """
+        return {
+            inverter_id: average(series, interval)
+            for inverter_id, series in self.power_series().items()
+        }
+
+    def power_by_day(self, timezone: str) -> dict[str, dict[date, Series]]:
+        """Split the power graph per inverter by local day.
+
+        The naive timestamps of the graph are in the local time of the site,
+        and are converted to UTC first.
+
+        Args:
+        ----
+            timezone: The timezone of the site, see `Site.timezone`.
+
+        Returns:
+        -------
+            A dictionary with a Series object per local day per inverter,
+            with the timestamps in UTC.
+
+        """
+        converter = get_local_time(timezone)
+        return {
+            inverter_id: converter.split_days(
+                Series(converter.from_local(series.timestamps), series.values)
+            )
+            for inverter_id, series in self.power_series().items()
+        }
+
     @property
     def generate_energy_stats_inverter(self) -> dict[str, list[dict[str, Any]]] | None:
         """Generate energy statistics by inverter."""
@@ -182,6 +298,11 @@ class Site(DataClassORJSONMixin):
         metadata=field_options(alias="dt_created"), default=None
     )
 
+    @property
+    def local_time(self) -> LocalTime:
+        """Return the converter to the local time of the site."""
+        return get_local_time(self.timezone)
+
 
 @dataclass
 class Address(DataClassORJSONMixin):
@@ -0,0 +1,92 @@
+"""Event loop lag monitoring for Autarco clients."""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+from dataclasses import dataclass, field
+from typing import Self
+
+
+@dataclass
+class LoopLagMonitor:
+    """Measure how late the event loop runs a periodic wake-up.
+
+    Every `interval` seconds, a task checks how much later than planned it
+    was woken up. That lag is the time the loop was blocked by synchronous
+    work, such as parsing a large response.
+    """
+
+    interval: float = 0.1
+
+    samples: int = 0
+    last: float = 0.0
+    maximum: float = 0.0
+    total: float = 0.0
+
+    _task: asyncio.Task[None] | None = field(default=None, repr=False)
+
+    @property
+    def mean(self) -> float:
+        """Return the mean lag in seconds."""
+        return self.total / self.samples if self.samples else 0.0
+
+    def record(self, lag: float) -> None:
+        """Record a measured lag.
+
+        Args:
+        ----
+            lag: The lag in seconds.
+
+        """
+        self.samples += 1
+        self.last = lag
+        self.total += lag
+        self.maximum = max(self.maximum, lag)
+
+    def reset(self) -> None:
+        """Reset the measured lag."""
+        self.samples = 0
+        self.last = self.maximum = self.total = 0.0
+
+    async def _run(self) -> None:
+        """Measure the lag until cancelled."""
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.record(max(0.0, loop.time() - expected))
+
+    def start(self) -> None:
+        """Start measuring in the running event loop."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop measuring."""
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    async def __aenter__(self) -> Self:
+        """Async enter.
+
+        Returns
+        -------
+            The LoopLagMonitor object.
+
+        """
+        self.start()
+        return self
+
+    async def __aexit__(self, *_exc_info: object) -> None:
+        """Async exit.
+
+        Args:
+        ----
+            _exc_info: Exec type.
+
+        """
+        await self.stop()
@@ -0,0 +1,209 @@
+"""Pool of Autarco clients for many accounts."""
+
+from __future__ import annotations
+
+import asyncio
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Self
+
+from aiohttp import ClientSession, TCPConnector
+
+from .autarco import Autarco
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator
+
+
+class FairLimiter:
+    """Limit the number of concurrent requests, fair across accounts.
+
+    When all slots are taken, waiting requests are queued per account and a
+    freed slot goes to the accounts in round-robin order. A single busy
+    account can therefore not starve the others.
+    """
+
+    def __init__(self, limit: int) -> None:
+        """Initialize the limiter.
+
+        Args:
+        ----
+            limit: The maximum number of concurrent requests.
+
+        """
+        self.limit = limit
+        self._free = limit
+        self._queues: OrderedDict[str, deque[asyncio.Future[None]]] = OrderedDict()
+
+    @property
+    def in_use(self) -> int:
+        """Return the number of taken slots."""
+        return self.limit - self._free
+
+    @property
+    def waiting(self) -> int:
+        """Return the number of queued requests."""
+        return sum(len(queue) for queue in self._queues.values())
+
+    def try_acquire(self) -> bool:
+        """Take a free slot without waiting, only when nobody is queued.
+
+        Returns
+        -------
+            True if the slot was taken, it has to be released afterwards.
+
+        """
+        if self._free > 0 and not self._queues:
+            self._free -= 1
+            return True
+        return False
+
+    async def acquire(self, account: str) -> None:
+        """Wait for a free slot.
+
+        Args:
+        ----
+            account: The account requesting the slot.
+
+        """
+        if self.try_acquire():
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._queues.setdefault(account, deque()).append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just before the cancellation.
+                self.release()
+            else:
+                queue = self._queues.get(account)
+                if queue is not None and waiter in queue:
+                    queue.remove(waiter)
+                    if not queue:
+                        del self._queues[account]
+            raise
+
+    def release(self) -> None:
+        """Hand the slot to the next account in line, or free it."""
+        while self._queues:
+            account, queue = next(iter(self._queues.items()))
+            waiter = queue.popleft()
+            if queue:
+                self._queues.move_to_end(account)
+            else:
+                del self._queues[account]
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._free += 1
+
+    @asynccontextmanager
+    async def slot(self, account: str) -> AsyncIterator[None]:
+        """Hold a slot for the duration of the context.
+
+        Args:
+        ----
+            account: The account requesting the slot.
+
+        """
+        await self.acquire(account)
+        try:
+            yield
+        finally:
+            self.release()
+
+
+@dataclass
+class AutarcoPool:
+    """Hand out Autarco clients per account, sharing one connection pool.
+
+    All clients share a single `ClientSession` with a tuned connector, and a
+    global budget of `max_concurrency` requests that is shared fairly between
+    the accounts.
+    """
+
+    max_concurrency: int = 20
+    max_connections: int = 100
+    keepalive_timeout: float = 60.0
+    dns_cache_ttl: int = 300
+    request_timeout: float = 15.0
+    session: ClientSession | None = None
+
+    _close_session: bool = False
+    _clients: dict[tuple[str, str], Autarco] = field(default_factory=dict)
+    _limiter: FairLimiter | None = None
+
+    @property
+    def limiter(self) -> FairLimiter:
+        """Return the limiter shared by all clients."""
+        if self._limiter is None:
+            self._limiter = FairLimiter(self.max_concurrency)
+        return self._limiter
+
+    def client(self, email: str, password: str) -> Autarco:
+        """Get the client of an account, created on first use.
+
+        Args:
+        ----
+            email: The email address of the account.
+            password: The password of the account.
+
+        Returns:
+        -------
+            An Autarco object using the shared session.
+
+        """
+        if self.session is None:
+            self.session = ClientSession(
+                connector=TCPConnector(
+                    limit=self.max_connections,
+                    ttl_dns_cache=self.dns_cache_ttl,
+                    keepalive_timeout=self.keepalive_timeout,
+                )
+            )
+            self._close_session = True
+        key = (email, password)
+        if key not in self._clients:
+            self._clients[key] = Autarco(
+                email=email,
+                password=password,
+                request_timeout=self.request_timeout,
+                session=self.session,
+                limiter=self.limiter,
+            )
+        return self._clients[key]
+
+    @property
+    def clients(self) -> list[Autarco]:
+        """Return all clients handed out by the pool."""
+        return list(self._clients.values())
+
+    async def close(self) -> None:
+        """Close all clients and the shared session."""
+        await asyncio.gather(*(client.close() for client in self._clients.values()))
+        self._clients.clear()
+        if self.session and self._close_session:
+            await self.session.close()
+            self.session = None
+
+    async def __aenter__(self) -> Self:
+        """Async enter.
+
+        Returns
+        -------
+            The AutarcoPool object.
+
+        """
+        return self
+
+    async def __aexit__(self, *_exc_info: object) -> None:
+        """Async exit.
+
+        Args:
+        ----
+            _exc_info: Exec type.
+
+        """
+        await self.close()
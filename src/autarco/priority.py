@@ -0,0 +1,181 @@
+"""Priority-aware scheduling of requests to the Autarco API."""
+
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+from typing import TYPE_CHECKING
+
+from .exceptions import AutarcoRequestDroppedError
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator, Iterator
+
+
+class Priority(IntEnum):
+    """Enumeration representing the priority class of a request."""
+
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+
+_PRIORITY: ContextVar[Priority | None] = ContextVar("autarco_priority", default=None)
+
+
+@contextmanager
+def request_priority(priority: Priority) -> Iterator[None]:
+    """Send all requests within the context with the given priority.
+
+    Args:
+    ----
+        priority: The priority class, overriding the default of the getters.
+
+    """
+    token = _PRIORITY.set(priority)
+    try:
+        yield
+    finally:
+        _PRIORITY.reset(token)
+
+
+def current_priority(default: Priority) -> Priority:
+    """Get the priority set by `request_priority`, or the given default."""
+    priority = _PRIORITY.get()
+    return default if priority is None else priority
+
+
+class RequestScheduler:
+    """Schedule requests by priority class, with per-class concurrency caps.
+
+    Queued interactive requests always go before queued background requests.
+    A queued request is dropped when less than `min_remaining` seconds would
+    be left before its deadline, as it can no longer finish in time.
+    """
+
+    def __init__(
+        self,
+        limit: int = 10,
+        caps: dict[Priority, int] | None = None,
+        min_remaining: float = 1.0,
+    ) -> None:
+        """Initialize the scheduler.
+
+        Args:
+        ----
+            limit: The maximum number of concurrent requests.
+            caps: The maximum number of concurrent requests per priority
+                class, by default background requests may use half the limit.
+            min_remaining: The minimum time a request needs to finish.
+
+        """
+        self.limit = limit
+        self.caps = caps or {Priority.BACKGROUND: max(1, limit // 2)}
+        self.min_remaining = min_remaining
+        self.running: dict[Priority, int] = dict.fromkeys(Priority, 0)
+        self.dropped: dict[Priority, int] = dict.fromkeys(Priority, 0)
+        self._queues: dict[Priority, deque[asyncio.Future[None]]] = {
+            priority: deque() for priority in Priority
+        }
+
+    def _has_room(self, priority: Priority) -> bool:
+        """Return True if a request of the priority class may start."""
+        if sum(self.running.values()) >= self.limit:
+            return False
+        return self.running[priority] < self.caps.get(priority, self.limit)
+
+    def _dispatch(self) -> None:
+        """Start queued requests while there is room, by priority."""
+        for priority in Priority:
+            queue = self._queues[priority]
+            while queue and self._has_room(priority):
+                waiter = queue.popleft()
+                if not waiter.done():
+                    self.running[priority] += 1
+                    waiter.set_result(None)
+
+    async def acquire(self, priority: Priority, deadline: float) -> None:
+        """Wait until the request may start.
+
+        Args:
+        ----
+            priority: The priority class of the request.
+            deadline: The event loop time the request has to be finished by.
+
+        Raises:
+        ------
+            AutarcoRequestDroppedError: The request can no longer finish in
+                time.
+
+        """
+        if self.try_acquire(priority):
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._queues[priority].append(waiter)
+        try:
+            async with asyncio.timeout_at(deadline - self.min_remaining):
+                await waiter
+        except TimeoutError as exception:
+            self._abandon(priority, waiter)
+            self.dropped[priority] += 1
+            msg = "Request dropped, it can no longer finish before its deadline"
+            raise AutarcoRequestDroppedError(msg) from exception
+        except asyncio.CancelledError:
+            self._abandon(priority, waiter)
+            raise
+
+    def try_acquire(self, priority: Priority) -> bool:
+        """Take a slot without waiting, only when no request is queued for it.
+
+        Args:
+        ----
+            priority: The priority class of the request.
+
+        Returns:
+        -------
+            True if the slot was taken, it has to be released afterwards.
+
+        """
+        if any(self._queues[p] for p in Priority if p <= priority) or not (
+            self._has_room(priority)
+        ):
+            return False
+        self.running[priority] += 1
+        return True
+
+    def _abandon(self, priority: Priority, waiter: asyncio.Future[None]) -> None:
+        """Give up waiting, handing back the slot if it was just granted."""
+        if waiter.done() and not waiter.cancelled():
+            self.release(priority)
+        elif waiter in self._queues[priority]:
+            self._queues[priority].remove(waiter)
+
+    def release(self, priority: Priority) -> None:
+        """Free the slot of a finished request.
+
+        Args:
+        ----
+            priority: The priority class of the request.
+
+        """
+        self.running[priority] -= 1
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, priority: Priority, deadline: float) -> AsyncIterator[None]:
+        """Hold a slot for the duration of the context.
+
+        Args:
+        ----
+            priority: The priority class of the request.
+            deadline: The event loop time the request has to be finished by.
+
+        """
+        await self.acquire(priority, deadline)
+        try:
+            yield
+        finally:
+            self.release(priority)
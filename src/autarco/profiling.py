@@ -0,0 +1,225 @@
+"""Opt-in CPU and allocation profiling of the Autarco client."""
+
+from __future__ import annotations
+
+import cProfile
+import functools
+import pstats
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable
+
+# Paths with less than this share of the total time are left out, as they
+# are too thin to show in a flame graph, and expanding them is expensive.
+_MIN_SHARE = 0.001
+_MAX_DEPTH = 64
+
+
+def _label(function: tuple[str, int, str]) -> str:
+    """Get the flame graph label of a pstats function key."""
+    filename, line, name = function
+    if filename == "~":
+        return name
+    return f"{name} ({Path(filename).name}:{line})"
+
+
+def collapse(stats: pstats.Stats) -> dict[str, int]:
+    """Rebuild collapsed stacks from the call graph of profile statistics.
+
+    cProfile only records caller and callee pairs, so the time of a function
+    is split over its callers by their share of its cumulative time. Paths
+    with less than 0.1% of the total time are left out.
+
+    Args:
+    ----
+        stats: The profile statistics.
+
+    Returns:
+    -------
+        The own time in microseconds per stack, with ';' separated frames.
+
+    """
+    # The typeshed stubs of pstats leave out the statistics table.
+    entries: dict[Any, Any] = stats.stats  # ty:ignore[unresolved-attribute]
+    callees: dict[Any, dict[Any, Any]] = {}
+    for function, (*_, callers) in entries.items():
+        for caller, edge in callers.items():
+            callees.setdefault(caller, {})[function] = edge
+
+    labels = {function: _label(function) for function in entries}
+    threshold = _MIN_SHARE * sum(entry[2] for entry in entries.values())
+    stacks: dict[str, int] = {}
+    on_stack: set[Any] = set()
+
+    def walk(function: Any, parent: str, depth: int, share: float) -> None:
+        key = f"{parent};{labels[function]}" if parent else labels[function]
+        if (micros := round(entries[function][2] * share * 1_000_000)) > 0:
+            stacks[key] = stacks.get(key, 0) + micros
+        if depth >= _MAX_DEPTH:
+            return
+        on_stack.add(function)
+        for callee, edge in callees.get(function, {}).items():
+            callee_total = entries[callee][3]
+            if not callee_total or callee in on_stack:
+                continue
+            callee_share = share * edge[3] / callee_total
+            if callee_share * callee_total >= threshold:
+                walk(callee, key, depth + 1, callee_share)
+        on_stack.discard(function)
+
+    for function, (*_, callers) in entries.items():
+        if not callers:
+            walk(function, "", 1, 1.0)
+    return stacks
+
+
+@dataclass
+class Profiler:
+    """Profile the public methods of a client over sampling windows.
+
+    Every public method gets its own cProfile statistics, and tracemalloc
+    traces the allocations. When a window ends, the statistics are dumped
+    into `directory` as pstats files, collapsed stacks for flame graphs and
+    a tracemalloc snapshot, and a new window starts.
+
+    Only one call is profiled at a time, calls made while another call is
+    being profiled are counted as skipped. Other tasks that run while the
+    profiled call awaits are included in its statistics.
+    """
+
+    directory: Path
+    window: float = 60.0
+    trace_frames: int = 25
+    clock: Callable[[], float] = time.monotonic
+
+    calls: dict[str, int] = field(default_factory=dict)
+    skipped: int = 0
+    windows: int = 0
+
+    _profiles: dict[str, cProfile.Profile] = field(default_factory=dict)
+    _active: bool = False
+    _started: float | None = None
+    _tracing: bool = False
+
+    def wrap[T](
+        self, name: str, method: Callable[..., Awaitable[T]]
+    ) -> Callable[..., Awaitable[T]]:
+        """Wrap a coroutine method, to profile its calls.
+
+        Args:
+        ----
+            name: The name of the method.
+            method: The bound method.
+
+        Returns:
+        -------
+            The wrapped method.
+
+        """
+
+        @functools.wraps(method)
+        async def wrapper(*args: Any, **kwargs: Any) -> T:
+            if self._active:
+                self.skipped += 1
+                return await method(*args, **kwargs)
+            self._start()
+            profile = self._profiles.setdefault(name, cProfile.Profile())
+            self._active = True
+            profile.enable()
+            try:
+                return await method(*args, **kwargs)
+            finally:
+                profile.disable()
+                self._active = False
+                self.calls[name] = self.calls.get(name, 0) + 1
+                if (
+                    self._started is not None
+                    and self.clock() - self._started >= self.window
+                ):
+                    self.dump()
+
+        return wrapper
+
+    def _start(self) -> None:
+        """Start a window, if none is running."""
+        if self._started is None:
+            self._started = self.clock()
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.trace_frames)
+            self._tracing = True
+
+    def dump(self) -> list[Path]:
+        """Dump the statistics of the current window and start a new one.
+
+        Returns
+        -------
+            The paths of the written files.
+
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        paths: list[Path] = []
+        if tracemalloc.is_tracing():
+            path = self.directory / f"allocations-{self.windows}.tracemalloc"
+            tracemalloc.take_snapshot().dump(str(path))
+            paths.append(path)
+        # Tracing slows down writing the statistics, it restarts with the
+        # next profiled call.
+        self._stop_tracing()
+
+        for name, profile in self._profiles.items():
+            stem = f"{name}-{self.windows}"
+            profile.dump_stats(path := self.directory / f"{stem}.pstats")
+            paths.append(path)
+            stacks = collapse(pstats.Stats(profile))
+            path = self.directory / f"{stem}.folded"
+            path.write_text(
+                "".join(f"{stack} {micros}\n" for stack, micros in stacks.items())
+            )
+            paths.append(path)
+
+        self._profiles = {}
+        self._started = None
+        self.windows += 1
+        return paths
+
+    def _stop_tracing(self) -> None:
+        """Stop tracing allocations, if the profiler started it."""
+        if self._tracing:
+            tracemalloc.stop()
+            self._tracing = False
+
+    def stop(self) -> None:
+        """Dump the current window and stop tracing allocations.
+
+        When a call of another client is being profiled, the window is left
+        running, and it is dumped when it ends.
+        """
+        if self._active:
+            return
+        if self._profiles:
+            self.dump()
+        self._stop_tracing()
+
+
+@functools.cache
+def get_profiler(directory: Path) -> Profiler:
+    """Get the profiler shared by the clients of this process.
+
+    Clients profiling into the same directory share one profiler, so they
+    do not overwrite each other's files, and one of them owns tracemalloc.
+
+    Args:
+    ----
+        directory: The output directory.
+
+    Returns:
+    -------
+        The Profiler object of the directory.
+
+    """
+    return Profiler(directory)
@@ -0,0 +1,367 @@
+"""Indexed registry of the sites in an Autarco account."""
+
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .autarco import Autarco
+    from .models import AccountSite, Inverter, Site
+
+
+@dataclass
+class FleetRegistry:
+    """Keep the sites of an account with hash indexes for fast selection.
+
+    The registry loads the account and enriches every new site with
+    `get_site`, concurrently. Sites are indexed by public key, site id and
+    health, and by having a battery or consumption meter. A refresh only
+    fetches the details of added sites and unindexes removed sites.
+    """
+
+    client: Autarco
+    concurrency: int = 8
+
+    sites: dict[str, AccountSite] = field(default_factory=dict)
+    details: dict[str, Site] = field(default_factory=dict)
+
+    _by_site_id: dict[int, str] = field(default_factory=dict)
+    _by_health: dict[str, set[str]] = field(default_factory=dict)
+    _battery: set[str] = field(default_factory=set)
+    _consumption_meter: set[str] = field(default_factory=set)
+
+    def __len__(self) -> int:
+        """Return the number of registered sites."""
+        return len(self.sites)
+
+    def __contains__(self, public_key: object) -> bool:
+        """Return True if the site is registered."""
+        return public_key in self.sites
+
+    async def refresh(self) -> tuple[set[str], set[str]]:
+        """Synchronize the registry with the account.
+
+        The details of new sites are fetched concurrently. A site whose
+        details could not be fetched is left out, and retried on the next
+        refresh.
+
+        Returns
+        -------
+            The public keys of the added and removed sites.
+
+        Raises
+        ------
+            AutarcoError: Fetching the details of a new site failed, after
+                all other sites have been registered.
+
+        """
+        account = {site.public_key: site for site in await self.client.get_account()}
+
+        removed = self.sites.keys() - account.keys()
+        for public_key in removed:
+            self._unindex(public_key)
+
+        for public_key in self.sites.keys() & account.keys():
+            self._unindex_health(public_key)
+            self.sites[public_key] = account[public_key]
+            self._index_health(public_key)
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def fetch(public_key: str) -> Site:
+            async with semaphore:
+                return await self.client.get_site(public_key)
+
+        new = [key for key in account if key not in self.sites]
+        results = await asyncio.gather(
+            *(fetch(public_key) for public_key in new), return_exceptions=True
+        )
+        added: set[str] = set()
+        errors: list[BaseException] = []
+        for public_key, result in zip(new, results, strict=True):
+            if isinstance(result, BaseException):
+                errors.append(result)
+                continue
+            self._index(account[public_key], result)
+            added.add(public_key)
+        if errors:
+            raise errors[0]
+        return added, removed
+
+    def _index(self, account_site: AccountSite, site: Site) -> None:
+        """Add a site to the indexes."""
+        public_key = account_site.public_key
+        self.sites[public_key] = account_site
+        self.details[public_key] = site
+        self._by_site_id[account_site.site_id] = public_key
+        self._index_health(public_key)
+        if site.has_battery:
+            self._battery.add(public_key)
+        if site.has_consumption_meter:
+            self._consumption_meter.add(public_key)
+
+    def _unindex(self, public_key: str) -> None:
+        """Remove a site from the indexes."""
+        self._unindex_health(public_key)
+        account_site = self.sites.pop(public_key)
+        self.details.pop(public_key, None)
+        if self._by_site_id.get(account_site.site_id) == public_key:
+            del self._by_site_id[account_site.site_id]
+        self._battery.discard(public_key)
+        self._consumption_meter.discard(public_key)
+
+    def _index_health(self, public_key: str) -> None:
+        """Add a site to the health index."""
+        health = self.sites[public_key].health
+        self._by_health.setdefault(health, set()).add(public_key)
+
+    def _unindex_health(self, public_key: str) -> None:
+        """Remove a site from the health index."""
+        health = self.sites[public_key].health
+        keys = self._by_health.get(health)
+        if keys is not None:
+            keys.discard(public_key)
+            if not keys:
+                del self._by_health[health]
+
+    def get(self, public_key: str) -> AccountSite | None:
+        """Get a site by its public key.
+
+        Args:
+        ----
+            public_key: The public key from the site.
+
+        Returns:
+        -------
+            The AccountSite object, or None if unknown.
+
+        """
+        return self.sites.get(public_key)
+
+    def by_site_id(self, site_id: int) -> AccountSite | None:
+        """Get a site by its site id.
+
+        Args:
+        ----
+            site_id: The site id from the account.
+
+        Returns:
+        -------
+            The AccountSite object, or None if unknown.
+
+        """
+        public_key = self._by_site_id.get(site_id)
+        return None if public_key is None else self.sites[public_key]
+
+    def with_health(self, health: str) -> set[str]:
+        """Get the public keys of the sites with a health status.
+
+        Args:
+        ----
+            health: The health status, for example 'OK'.
+
+        Returns:
+        -------
+            A set of public keys.
+
+        """
+        return set(self._by_health.get(health, ()))
+
+    def select(
+        self,
+        *,
+        has_battery: bool | None = None,
+        has_consumption_meter: bool | None = None,
+        health: str | None = None,
+        exclude_health: str | None = None,
+    ) -> set[str]:
+        """Select sites by the indexed properties.
+
+        Args:
+        ----
+            has_battery: Only sites with (True) or without (False) battery.
+            has_consumption_meter: Only sites with (True) or without (False)
+                consumption meter.
+            health: Only sites with this health status.
+            exclude_health: Only sites without this health status.
+
+        Returns:
+        -------
+            A set of public keys of the matching sites.
+
+        """
+        include: list[set[str]] = []
+        exclude: list[set[str]] = []
+        for flag, keys in (
+            (has_battery, self._battery),
+            (has_consumption_meter, self._consumption_meter),
+        ):
+            if flag is not None:
+                (include if flag else exclude).append(keys)
+        if health is not None:
+            include.append(self._by_health.get(health, set()))
+        if exclude_health is not None:
+            include.append(
+                set().union(
+                    *(
+                        keys
+                        for value, keys in self._by_health.items()
+                        if value != exclude_health
+                    )
+                )
+            )
+
+        if include:
+            # Start from the smallest index, so the cost follows the result.
+            include.sort(key=len)
+            result = set(include[0]).intersection(*include[1:])
+        else:
+            result = set(self.sites)
+        return result.difference(*exclude)
+
+
+@dataclass
+class InverterEntry:
+    """Object representing an inverter in the fleet with its site."""
+
+    public_key: str
+    inverter_id: str
+    inverter: Inverter
+
+
+@dataclass
+class InverterIndex:
+    """Index all inverters of the fleet by serial number.
+
+    The index is updated per site with the result of `get_inverters`, and
+    keeps secondary indexes on the health and grid state of the inverters.
+    Unchanged inverters are skipped, so an update only costs the changes.
+    """
+
+    _by_serial: dict[str, InverterEntry] = field(default_factory=dict)
+    _by_site: dict[str, set[str]] = field(default_factory=dict)
+    _by_health: dict[str, set[str]] = field(default_factory=dict)
+    _grid_turned_off: set[str] = field(default_factory=set)
+
+    def __len__(self) -> int:
+        """Return the number of indexed inverters."""
+        return len(self._by_serial)
+
+    def update(self, public_key: str, inverters: dict[str, Inverter]) -> None:
+        """Update the index with the inverters of a site.
+
+        Inverters of the site that are no longer reported are removed.
+
+        Args:
+        ----
+            public_key: The public key from the site.
+            inverters: The inverters as returned by `get_inverters`.
+
+        """
+        serials = {inverter.serial_number for inverter in inverters.values()}
+        for serial in self._by_site.get(public_key, set()) - serials:
+            self._remove(serial)
+        for inverter_id, inverter in inverters.items():
+            entry = self._by_serial.get(inverter.serial_number)
+            if entry is not None:
+                if entry.public_key == public_key and entry.inverter == inverter:
+                    continue
+                self._remove(inverter.serial_number)
+            self._add(InverterEntry(public_key, inverter_id, inverter))
+
+    def remove_site(self, public_key: str) -> None:
+        """Remove all inverters of a site.
+
+        Args:
+        ----
+            public_key: The public key from the site.
+
+        """
+        for serial in list(self._by_site.get(public_key, ())):
+            self._remove(serial)
+
+    def _add(self, entry: InverterEntry) -> None:
+        """Add an inverter to the indexes."""
+        serial = entry.inverter.serial_number
+        self._by_serial[serial] = entry
+        self._by_site.setdefault(entry.public_key, set()).add(serial)
+        self._by_health.setdefault(entry.inverter.health, set()).add(serial)
+        if entry.inverter.grid_turned_off:
+            self._grid_turned_off.add(serial)
+
+    def _remove(self, serial: str) -> None:
+        """Remove an inverter from the indexes."""
+        entry = self._by_serial.pop(serial)
+        for index, key in (
+            (self._by_site, entry.public_key),
+            (self._by_health, entry.inverter.health),
+        ):
+            index[key].discard(serial)
+            if not index[key]:
+                del index[key]
+        self._grid_turned_off.discard(serial)
+
+    def find(self, serial_number: str) -> InverterEntry | None:
+        """Get an inverter and its site by serial number.
+
+        Args:
+        ----
+            serial_number: The serial number of the inverter.
+
+        Returns:
+        -------
+            The InverterEntry object, or None if unknown.
+
+        """
+        return self._by_serial.get(serial_number)
+
+    def site_serials(self, public_key: str) -> set[str]:
+        """Get the serial numbers of the inverters of a site.
+
+        Args:
+        ----
+            public_key: The public key from the site.
+
+        Returns:
+        -------
+            A set of serial numbers.
+
+        """
+        return set(self._by_site.get(public_key, ()))
+
+    def with_health(self, health: str) -> set[str]:
+        """Get the serial numbers of the inverters with a health status.
+
+        Args:
+        ----
+            health: The health status, for example 'OK'.
+
+        Returns:
+        -------
+            A set of serial numbers.
+
+        """
+        return set(self._by_health.get(health, ()))
+
+    def unhealthy(self, healthy: str = "OK") -> set[str]:
+        """Get the serial numbers of the inverters that are not healthy.
+
+        Args:
+        ----
+            healthy: The health status of a healthy inverter.
+
+        Returns:
+        -------
+            A set of serial numbers.
+
+        """
+        return set().union(
+            *(keys for health, keys in self._by_health.items() if health != healthy)
+        )
+
+    @property
+    def grid_turned_off(self) -> set[str]:
+        """Return the serial numbers of the inverters with the grid turned off."""
+        return set(self._grid_turned_off)
@@ -0,0 +1,355 @@
+"""Adaptive polling scheduler for the Autarco API."""
+
+from __future__ import annotations
+
+import asyncio
+import inspect
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any
+
+from .exceptions import AutarcoError
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable
+
+    from .autarco import Autarco
+
+ENDPOINTS: tuple[str, ...] = ("solar", "battery", "inverters")
+
+# Endpoints that only change with the solar production, the battery keeps
+# (dis)charging at night.
+_SOLAR_ENDPOINTS = frozenset({"solar", "inverters"})
+
+
+@dataclass
+class Cadence:
+    """Object representing the learned update cadence of a site endpoint."""
+
+    interval: float
+    next_fetch: float
+    last_value: Any = None
+    last_fetch: float | None = None
+    last_change: float | None = None
+    error: float = 0.0
+    bracketed: bool = False
+    probed: bool = False
+    changes: int = 0
+
+
+@dataclass
+class AdaptiveScheduler:
+    """Poll sites just after the API is expected to have refreshed its data.
+
+    The scheduler learns the effective refresh interval of every site endpoint
+    from the moments its value changes. Every cycle probes `margin` seconds
+    before the expected refresh and fetches again `margin` seconds after it,
+    so a refresh is bracketed between an unchanged and a changed value. When
+    the probe already sees the change, the interval was overestimated and is
+    halved. Sites are spread over the interval on start, due sites are
+    fetched concurrently up to `concurrency`, and polling of the solar and
+    inverters endpoints backs off to `night_interval` while `pv_now` is 0.
+    """
+
+    client: Autarco
+    sites: list[str]
+    endpoints: tuple[str, ...] = ("solar",)
+
+    interval: float = 300.0
+    min_interval: float = 30.0
+    max_interval: float = 900.0
+    night_interval: float = 1800.0
+    margin: float = 5.0
+    smoothing: float = 0.3
+    concurrency: int = 10
+
+    clock: Callable[[], float] = time.monotonic
+
+    requests: int = 0
+    unchanged: int = 0
+    errors: int = 0
+
+    _cadences: dict[tuple[str, str], Cadence] = field(default_factory=dict)
+    _night: set[str] = field(default_factory=set)
+
+    def __post_init__(self) -> None:
+        """Validate the endpoints and spread the sites over the interval.
+
+        Raises
+        ------
+            ValueError: If an unknown endpoint is given.
+
+        """
+        unknown = set(self.endpoints) - set(ENDPOINTS)
+        if unknown:
+            msg = f"Unknown endpoint(s) for the scheduler: {sorted(unknown)}"
+            raise ValueError(msg)
+        # Sites are added and removed later on, without touching the caller's list.
+        self.sites = list(self.sites)
+        now = self.clock()
+        for site in self.sites:
+            self.add_site(site, now=now)
+
+    def add_site(self, public_key: str, *, now: float | None = None) -> None:
+        """Start scheduling a site, staggered against the existing sites.
+
+        Args:
+        ----
+            public_key: The public key from the site.
+            now: The current clock value, defaults to the scheduler clock.
+
+        """
+        if now is None:
+            now = self.clock()
+        if public_key not in self.sites:
+            self.sites.append(public_key)
+        offset = self.interval * self.sites.index(public_key) / len(self.sites)
+        for endpoint in self.endpoints:
+            self._cadences.setdefault(
+                (public_key, endpoint),
+                Cadence(interval=self.interval, next_fetch=now + offset),
+            )
+
+    def remove_site(self, public_key: str) -> None:
+        """Stop scheduling a site.
+
+        Args:
+        ----
+            public_key: The public key from the site.
+
+        """
+        if public_key in self.sites:
+            self.sites.remove(public_key)
+        self._night.discard(public_key)
+        for endpoint in self.endpoints:
+            self._cadences.pop((public_key, endpoint), None)
+
+    def cadence(self, public_key: str, endpoint: str = "solar") -> Cadence:
+        """Get the learned cadence of a site endpoint.
+
+        Args:
+        ----
+            public_key: The public key from the site.
+            endpoint: The scheduled endpoint, for example 'solar'.
+
+        Returns:
+        -------
+            A Cadence object.
+
+        """
+        return self._cadences[(public_key, endpoint)]
+
+    def due(self, now: float | None = None) -> list[tuple[str, str]]:
+        """Get the site endpoints that should be fetched now.
+
+        Args:
+        ----
+            now: The current clock value, defaults to the scheduler clock.
+
+        Returns:
+        -------
+            A list of (public_key, endpoint) tuples, earliest first.
+
+        """
+        if now is None:
+            now = self.clock()
+        due = [
+            key for key, cadence in self._cadences.items() if cadence.next_fetch <= now
+        ]
+        return sorted(due, key=lambda key: self._cadences[key].next_fetch)
+
+    def next_wakeup(self) -> float | None:
+        """Get the clock value of the earliest planned fetch."""
+        if not self._cadences:
+            return None
+        return min(cadence.next_fetch for cadence in self._cadences.values())
+
+    def observe(
+        self,
+        public_key: str,
+        endpoint: str,
+        value: Any,
+        *,
+        now: float | None = None,
+    ) -> bool:
+        """Learn from a fetched value and plan the next fetch.
+
+        Args:
+        ----
+            public_key: The public key from the site.
+            endpoint: The scheduled endpoint, for example 'solar'.
+            value: The value returned by the endpoint.
+            now: The current clock value, defaults to the scheduler clock.
+
+        Returns:
+        -------
+            True if the value changed since the previous fetch.
+
+        """
+        if now is None:
+            now = self.clock()
+        cadence = self._cadences[(public_key, endpoint)]
+        first = cadence.last_fetch is None
+        changed = first or value != cadence.last_value
+        if endpoint == "solar":
+            if value.power_production == 0:
+                self._night.add(public_key)
+            else:
+                self._night.discard(public_key)
+
+        if changed:
+            self._learn(cadence, now, first=first)
+            cadence.last_value = value
+            cadence.probed = False
+            anchor = cadence.last_change if cadence.last_change is not None else now
+            # Probe just before the expected refresh, to bracket it.
+            cadence.next_fetch = max(
+                now + self.margin,
+                anchor + cadence.interval - self.margin - cadence.error,
+            )
+        else:
+            self.unchanged += 1
+            cadence.probed = True
+            expected = (
+                cadence.last_change if cadence.last_change is not None else now
+            ) + cadence.interval
+            if now < expected + self.margin:
+                cadence.next_fetch = expected + self.margin
+            else:
+                # The refresh is late, try again shortly instead of a full cycle.
+                step = 2 * (now - cadence.last_fetch) if cadence.last_fetch else 0.0
+                cadence.next_fetch = now + min(
+                    self.min_interval, cadence.interval, max(step, 2 * self.margin)
+                )
+        cadence.last_fetch = now
+
+        if endpoint in _SOLAR_ENDPOINTS and public_key in self._night:
+            cadence.next_fetch = max(cadence.next_fetch, now + self.night_interval)
+        return changed
+
+    def _learn(self, cadence: Cadence, now: float, *, first: bool) -> None:
+        """Estimate the moment of a refresh and update the learned interval."""
+        if first or cadence.last_fetch is None:
+            # The first fetch does not tell when the value actually changed.
+            cadence.last_change = None
+            cadence.error = 0.0
+            cadence.bracketed = False
+            return
+        cadence.changes += 1
+        since = now - cadence.last_fetch
+        if cadence.probed and since <= max(self.min_interval, 2 * self.margin):
+            # Refreshed between the unchanged and the changed fetch.
+            moment = (cadence.last_fetch + now) / 2
+            if cadence.bracketed and cadence.last_change is not None:
+                cadence.interval = min(
+                    self.max_interval,
+                    max(
+                        self.min_interval,
+                        (1 - self.smoothing) * cadence.interval
+                        + self.smoothing * (moment - cadence.last_change),
+                    ),
+                )
+            cadence.last_change = moment
+            cadence.error = since / 2
+            cadence.bracketed = True
+            return
+        if not cadence.probed and since <= cadence.interval + self.margin:
+            # The probe already saw the change, so the refresh came earlier.
+            cadence.interval = max(self.min_interval, cadence.interval / 2)
+        # Only an upper bound of the refresh moment is known.
+        cadence.last_change = now
+        cadence.error = 0.0
+        cadence.bracketed = False
+
+    async def fetch(self, public_key: str, endpoint: str) -> tuple[Any, bool]:
+        """Fetch a site endpoint and learn from the result.
+
+        Args:
+        ----
+            public_key: The public key from the site.
+            endpoint: The scheduled endpoint, for example 'solar'.
+
+        Returns:
+        -------
+            The value returned by the endpoint and whether it changed.
+
+        """
+        getter: Callable[[str], Awaitable[Any]] = getattr(
+            self.client, f"get_{endpoint}"
+        )
+        self.requests += 1
+        value = await getter(public_key)
+        if (public_key, endpoint) not in self._cadences:
+            # The site was removed while it was being fetched.
+            return value, False
+        return value, self.observe(public_key, endpoint, value)
+
+    async def _poll(
+        self,
+        key: tuple[str, str],
+        callback: Callable[[str, str, Any], Awaitable[None] | None],
+        semaphore: asyncio.Semaphore,
+    ) -> None:
+        """Fetch a due site endpoint and report a changed value."""
+        public_key, endpoint = key
+        async with semaphore:
+            try:
+                value, changed = await self.fetch(public_key, endpoint)
+            except AutarcoError:
+                self.errors += 1
+                if (cadence := self._cadences.get(key)) is not None:
+                    cadence.next_fetch = self.clock() + self.min_interval
+                return
+        if changed:
+            result = callback(public_key, endpoint, value)
+            if inspect.isawaitable(result):
+                await result
+
+    async def run(
+        self,
+        callback: Callable[[str, str, Any], Awaitable[None] | None],
+    ) -> None:
+        """Keep polling the sites, calling the callback with changed values.
+
+        Due site endpoints are fetched concurrently, with at most
+        `concurrency` requests at a time, so a slow site does not delay the
+        others. A failing fetch is retried after `min_interval`.
+
+        Args:
+        ----
+            callback: Called with the public key, endpoint and new value.
+
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+        pending: dict[tuple[str, str], asyncio.Task[None]] = {}
+        try:
+            while True:
+                for key in self.due():
+                    if key not in pending:
+                        pending[key] = asyncio.create_task(
+                            self._poll(key, callback, semaphore)
+                        )
+                wakeups = [
+                    cadence.next_fetch
+                    for key, cadence in self._cadences.items()
+                    if key not in pending
+                ]
+                if not wakeups and not pending:
+                    return
+                timeout = max(0.0, min(wakeups) - self.clock()) if wakeups else None
+                if not pending:
+                    await asyncio.sleep(timeout or 0.0)
+                    continue
+                done, _ = await asyncio.wait(
+                    pending.values(),
+                    timeout=timeout,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                for key, task in list(pending.items()):
+                    if task in done:
+                        del pending[key]
+                        # Raise errors from the callback.
+                        task.result()
+        finally:
+            for task in pending.values():
+                task.cancel()
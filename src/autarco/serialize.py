@@ -0,0 +1,235 @@
+"""Bulk serialization of Autarco model objects."""
+
+from __future__ import annotations
+
+import types
+import typing
+from dataclasses import dataclass, field, fields, is_dataclass
+from datetime import date, datetime
+from functools import cache, lru_cache
+from operator import attrgetter
+from typing import TYPE_CHECKING, Any
+
+import orjson
+from mashumaro.config import BaseConfig
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable
+    from dataclasses import Field
+
+    from .differ import SnapshotDiffer
+    from .models import Inverter
+
+# Types that orjson encodes the same way as mashumaro does.
+_NATIVE = (bool, int, float, str, date, datetime)
+
+
+class _UnsupportedError(Exception):
+    """Raised when a field type has no precomputed layout."""
+
+
+@dataclass(frozen=True)
+class _Layout:
+    """Object representing the precomputed field layout of a model class."""
+
+    getter: Callable[[Any], tuple[Any, ...]]
+    keys: tuple[str, ...]
+    encoders: tuple[tuple[str, Callable[[Any], Any]], ...]
+
+    def encode(self, obj: Any) -> dict[str, Any]:
+        """Encode a model object into a dictionary, like `to_dict`."""
+        data = dict(zip(self.keys, self.getter(obj), strict=True))
+        for key, encoder in self.encoders:
+            if (value := data[key]) is not None:
+                data[key] = encoder(value)
+        return data
+
+
+def _alias(item: Field[Any], aliases: dict[str, Any]) -> str:
+    """Get the serialized name of a field."""
+    alias = item.metadata.get("alias") or aliases.get(item.name, item.name)
+    # Aliases may also list several names, which only apply to deserialization.
+    if not isinstance(alias, str):
+        raise _UnsupportedError
+    return alias
+
+
+def _field_encoder(
+    annotation: Any, config: type[BaseConfig]
+) -> Callable[[Any], Any] | None:
+    """Get the encoder of a field type, None if orjson encodes it as is."""
+    if isinstance(annotation, types.UnionType):
+        options = [
+            arg for arg in typing.get_args(annotation) if arg is not types.NoneType
+        ]
+        if len(options) != 1:
+            raise _UnsupportedError
+        annotation = options[0]
+    strategies: dict[Any, Any] = dict(config.serialization_strategy or {})
+    if annotation in strategies:
+        # Values such as dates repeat across polls, and strategies are pure.
+        return lru_cache(maxsize=1024)(strategies[annotation].serialize)
+    if annotation in _NATIVE:
+        return None
+    if isinstance(annotation, type) and is_dataclass(annotation):
+        return _encoder(annotation)
+    raise _UnsupportedError
+
+
+@cache
+def _encoder(cls: Any) -> Callable[[Any], Any] | None:
+    """Get the encoder of a model class, cached per class.
+
+    None means orjson serializes the dataclass natively, with the same
+    result as `to_dict`. Classes with aliases or serialization strategies
+    get a precomputed layout, and other classes fall back to `to_dict`.
+    """
+    config: type[BaseConfig] = getattr(cls, "Config", BaseConfig)
+    # The options default to a sentinel, so only an explicit True counts.
+    if config.omit_none is True or config.omit_default is True:
+        return cls.to_dict
+    hints = typing.get_type_hints(cls)
+    by_alias = config.serialize_by_alias is True
+    aliases: dict[str, Any] = dict(config.aliases or {})
+    names: list[str] = []
+    keys: list[str] = []
+    encoders: list[tuple[str, Callable[[Any], Any]]] = []
+    try:
+        for item in fields(cls):
+            key = _alias(item, aliases) if by_alias else item.name
+            names.append(item.name)
+            keys.append(key)
+            if (encoder := _field_encoder(hints[item.name], config)) is not None:
+                encoders.append((key, encoder))
+    except _UnsupportedError:
+        return cls.to_dict
+
+    if keys == names and not encoders:
+        return None
+    getter = attrgetter(*names)
+    return _Layout(
+        getter=getter if len(names) > 1 else lambda obj: (getter(obj),),
+        keys=tuple(keys),
+        encoders=tuple(encoders),
+    ).encode
+
+
+def _prepare(objects: Iterable[Any]) -> list[Any]:
+    """Prepare model objects for a single orjson call."""
+    prepared: list[Any] = []
+    for obj in objects:
+        encoder = _encoder(type(obj))
+        prepared.append(obj if encoder is None else encoder(obj))
+    return prepared
+
+
+def dumps_batch(objects: Iterable[Any]) -> bytes:
+    """Serialize model objects into one JSON array.
+
+    Every object is encoded the same as its `to_dict`, including aliases and
+    serialization strategies, with the field layouts computed once per class.
+
+    Args:
+    ----
+        objects: The model objects, for example Solar and Site objects.
+
+    Returns:
+    -------
+        The JSON array.
+
+    """
+    return orjson.dumps(_prepare(objects))
+
+
+def dumps_ndjson(objects: Iterable[Any]) -> bytes:
+    """Serialize model objects as newline-delimited JSON.
+
+    Args:
+    ----
+        objects: The model objects, for example Solar and Site objects.
+
+    Returns:
+    -------
+        A JSON line per object.
+
+    """
+    return b"".join(
+        orjson.dumps(obj, option=orjson.OPT_APPEND_NEWLINE) for obj in _prepare(objects)
+    )
+
+
+@dataclass
+class BulkSerializer:
+    """Collect the model objects of a poll and serialize them at once.
+
+    With a `SnapshotDiffer`, objects that did not change since the previous
+    poll are skipped.
+    """
+
+    differ: SnapshotDiffer | None = None
+
+    _objects: list[Any] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        """Return the number of collected objects."""
+        return len(self._objects)
+
+    def add(self, public_key: str, obj: Any, key: str | None = None) -> bool:
+        """Collect a model object of a site.
+
+        Args:
+        ----
+            public_key: The public key from the site.
+            obj: The model object, for example a Solar object.
+            key: Optional key to tell apart objects of the same model within
+                a site, for example the inverter id.
+
+        Returns:
+        -------
+            True if the object was collected, False if it did not change.
+
+        """
+        if self.differ is not None and self.differ.diff(public_key, obj, key) is None:
+            return False
+        self._objects.append(obj)
+        return True
+
+    def add_inverters(self, public_key: str, inverters: dict[str, Inverter]) -> int:
+        """Collect all inverters of a site.
+
+        Args:
+        ----
+            public_key: The public key from the site.
+            inverters: The inverters as returned by `get_inverters`.
+
+        Returns:
+        -------
+            The number of collected inverters.
+
+        """
+        return sum(
+            self.add(public_key, inverter, inverter_id)
+            for inverter_id, inverter in inverters.items()
+        )
+
+    def dumps(self) -> bytes:
+        """Serialize the collected objects into one JSON array and clear them.
+
+        Returns
+        -------
+            The JSON array.
+
+        """
+        objects, self._objects = self._objects, []
+        return dumps_batch(objects)
+
+    def dumps_ndjson(self) -> bytes:
+        """Serialize the collected objects as JSON lines and clear them.
+
+        Returns
+        -------
+            A JSON line per object.
+
+        """
+        objects, self._objects = self._objects, []
+        return dumps_ndjson(objects)
@@ -0,0 +1,264 @@
+"""Compact time series and downsampling of Autarco graphs."""
+
+from __future__ import annotations
+
+import math
+from array import array
+from datetime import UTC
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+from . import _compat
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator, Sequence
+    from datetime import datetime, timedelta
+
+
+class Series(NamedTuple):
+    """Object representing a graph series as compact arrays.
+
+    The timestamps are seconds since the epoch. The naive timestamps of the
+    API are in the local time of the site, and are kept as wall-clock time,
+    see `LocalTime.from_local` to convert them to UTC.
+    """
+
+    timestamps: array[float]
+    values: array[float]
+
+
+def _array(values: Any) -> array[float]:
+    """Copy a NumPy array into a compact array."""
+    result = array("d")
+    result.frombytes(values.astype("float64").tobytes())
+    return result
+
+
+def epoch_seconds(timestamps: Sequence[datetime]) -> array[float]:
+    """Convert timestamps to seconds since the epoch.
+
+    Args:
+    ----
+        timestamps: The timestamps, naive timestamps are kept as wall-clock
+            time, as if they were UTC.
+
+    Returns:
+    -------
+        The seconds since the epoch per timestamp.
+
+    """
+    if (np := _compat.np) is not None and all(
+        timestamp.tzinfo is None for timestamp in timestamps
+    ):
+        return _array(np.array(timestamps, dtype="datetime64[s]").astype(np.int64))
+    return array(
+        "d",
+        [
+            (
+                timestamp if timestamp.tzinfo else timestamp.replace(tzinfo=UTC)
+            ).timestamp()
+            for timestamp in timestamps
+        ],
+    )
+
+
+def to_series(data: dict[datetime, int | None]) -> Series:
+    """Convert a graph series into compact arrays.
+
+    Missing samples are left out, instead of counting as 0.
+
+    Args:
+    ----
+        data: The values per timestamp, as in `Graphs.pv_power`.
+
+    Returns:
+    -------
+        A Series object.
+
+    """
+    timestamps = [timestamp for timestamp, value in data.items() if value is not None]
+    values = array("d", [value for value in data.values() if value is not None])
+    return Series(epoch_seconds(timestamps), values)
+
+
+def lttb(series: Series, threshold: int) -> Series:
+    """Downsample with the Largest-Triangle-Three-Buckets algorithm.
+
+    The first and last sample are kept, and of every bucket in between the
+    sample that forms the largest triangle with its neighbours, which keeps
+    the visual shape of the curve, including its peaks.
+
+    Args:
+    ----
+        series: The series to downsample.
+        threshold: The number of samples to keep, at least 3.
+
+    Returns:
+    -------
+        The downsampled Series object.
+
+    Raises:
+    ------
+        ValueError: The threshold is lower than 3.
+
+    """
+    if threshold < 3:
+        msg = "The threshold of LTTB should be at least 3"
+        raise ValueError(msg)
+    size = len(series.timestamps)
+    if threshold >= size:
+        return series
+
+    if (np := _compat.np) is not None:
+        selected = _lttb_vectorized(np, series, threshold)
+    else:
+        selected = _lttb(series, threshold)
+    return _select(series, selected)
+
+
+def _lttb_buckets(size: int, threshold: int) -> Iterator[tuple[int, int, slice]]:
+    """Get the start, end and following samples of every LTTB bucket."""
+    every = (size - 2) / (threshold - 2)
+    for bucket in range(threshold - 2):
+        start = int(bucket * every) + 1
+        end = int((bucket + 1) * every) + 1
+        following = slice(end, max(end + 1, min(int((bucket + 2) * every) + 1, size)))
+        yield start, end, following
+
+
+def _lttb_vectorized(np: Any, series: Series, threshold: int) -> list[int]:
+    """Get the indices of the samples LTTB keeps, with NumPy."""
+    x: Any = np.frombuffer(series.timestamps, dtype=np.float64)
+    y: Any = np.frombuffer(series.values, dtype=np.float64)
+    selected = [0]
+    for start, end, following in _lttb_buckets(len(x), threshold):
+        previous = selected[-1]
+        next_x, next_y = x[following].mean(), y[following].mean()
+        areas = np.abs(
+            (x[previous] - next_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (next_y - y[previous])
+        )
+        selected.append(start + int(areas.argmax()))
+    selected.append(len(x) - 1)
+    return selected
+
+
+def _lttb(series: Series, threshold: int) -> list[int]:
+    """Get the indices of the samples LTTB keeps."""
+    x, y = series
+    selected = [0]
+    for start, end, following in _lttb_buckets(len(x), threshold):
+        previous = selected[-1]
+        next_x = math.fsum(x[following]) / len(x[following])
+        next_y = math.fsum(y[following]) / len(y[following])
+        areas = [
+            abs(
+                (x[previous] - next_x) * (y[i] - y[previous])
+                - (x[previous] - x[i]) * (next_y - y[previous])
+            )
+            for i in range(start, end)
+        ]
+        selected.append(start + areas.index(max(areas)))
+    selected.append(len(x) - 1)
+    return selected
+
+
+def minmax(series: Series, buckets: int) -> Series:
+    """Downsample by keeping the minimum and maximum of every bucket.
+
+    The series is split into buckets with the same number of samples, so
+    every peak and dip survives.
+
+    Args:
+    ----
+        series: The series to downsample.
+        buckets: The number of buckets, at most twice as many samples are kept.
+
+    Returns:
+    -------
+        The downsampled Series object.
+
+    Raises:
+    ------
+        ValueError: The number of buckets is lower than 1.
+
+    """
+    if buckets < 1:
+        msg = "The number of buckets should be at least 1"
+        raise ValueError(msg)
+    size = len(series.timestamps)
+    if 2 * buckets >= size:
+        return series
+
+    if (np := _compat.np) is not None:
+        bucket = np.arange(size) * buckets // size
+        order = np.lexsort((np.frombuffer(series.values, dtype=np.float64), bucket))
+        ends = np.searchsorted(bucket, np.arange(1, buckets + 1))
+        starts = np.concatenate(([0], ends[:-1]))
+        selected = np.unique(np.concatenate((order[starts], order[ends - 1])))
+        return _select(series, selected.tolist())
+
+    keep: set[int] = set()
+    for index in range(buckets):
+        indices = range(-(-index * size // buckets), -(-(index + 1) * size // buckets))
+        keep.add(min(indices, key=series.values.__getitem__))
+        keep.add(max(reversed(indices), key=series.values.__getitem__))
+    return _select(series, sorted(keep))
+
+
+def average(series: Series, interval: timedelta) -> Series:
+    """Downsample by averaging the samples over fixed intervals.
+
+    Args:
+    ----
+        series: The series to downsample.
+        interval: The length of the intervals, aligned to the epoch.
+
+    Returns:
+    -------
+        The Series object with the mean per interval, at the interval start.
+
+    Raises:
+    ------
+        ValueError: The interval is not positive.
+
+    """
+    seconds = interval.total_seconds()
+    if seconds <= 0:
+        msg = "The interval to average over should be positive"
+        raise ValueError(msg)
+    if (np := _compat.np) is not None:
+        starts = (
+            np.floor(np.frombuffer(series.timestamps, dtype=np.float64) / seconds)
+            * seconds
+        )
+        keys, inverse, counts = np.unique(
+            starts, return_inverse=True, return_counts=True
+        )
+        sums = np.bincount(
+            inverse, weights=np.frombuffer(series.values, dtype=np.float64)
+        )
+        return Series(_array(keys), _array(sums / counts))
+
+    totals: dict[float, list[float]] = {}
+    for timestamp, value in zip(*series, strict=True):
+        totals.setdefault(math.floor(timestamp / seconds) * seconds, []).append(value)
+    ordered = sorted(totals.items())
+    return Series(
+        array("d", [start for start, _ in ordered]),
+        array("d", [math.fsum(values) / len(values) for _, values in ordered]),
+    )
+
+
+def _select(series: Series, indices: Sequence[int]) -> Series:
+    """Get the samples at the indices of a series."""
+    if (np := _compat.np) is not None:
+        return Series(
+            *(
+                _array(np.frombuffer(column, dtype=np.float64)[list(indices)])
+                for column in series
+            )
+        )
+    return Series(
+        array("d", [series.timestamps[index] for index in indices]),
+        array("d", [series.values[index] for index in indices]),
+    )
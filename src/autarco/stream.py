@@ -0,0 +1,203 @@
+"""Bounded stream of live snapshots from the Autarco API."""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+from collections import OrderedDict
+from dataclasses import dataclass
+from enum import StrEnum
+from typing import TYPE_CHECKING, Self
+
+from .exceptions import AutarcoError
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable, Hashable
+
+    from .models import Battery, Solar
+
+
+class OverflowPolicy(StrEnum):
+    """Enumeration representing what to do when the stream buffer is full."""
+
+    BLOCK = "block"
+    DROP_OLDEST = "drop_oldest"
+    COALESCE = "coalesce"
+
+
+@dataclass
+class Snapshot:
+    """Object representing the live data of a site at one moment."""
+
+    public_key: str
+    solar: Solar
+    battery: Battery | None
+    fetched_at: float
+
+
+class SnapshotStream:
+    """Poll sites and yield their snapshots through a bounded buffer.
+
+    Every site is polled by its own producer, once per `interval`. When the
+    consumer is slower than the producers, the overflow policy decides:
+
+    - BLOCK: producers wait for room, so no new requests are sent.
+    - DROP_OLDEST: the oldest buffered snapshot is dropped.
+    - COALESCE: a buffered snapshot of the same site is replaced by the new
+      one, if there is none the oldest snapshot is dropped.
+
+    An AutarcoError of a fetch is counted in `errors` and polling continues.
+    Any other error stops the producer of that site, and is raised by `get`.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[str], Awaitable[Snapshot]],
+        sites: list[str],
+        *,
+        interval: float = 60.0,
+        maxsize: int = 100,
+        overflow: OverflowPolicy = OverflowPolicy.BLOCK,
+    ) -> None:
+        """Initialize the stream.
+
+        Args:
+        ----
+            fetch: Fetch the snapshot of a site.
+            sites: The public keys of the sites to poll.
+            interval: The polling interval per site in seconds.
+            maxsize: The maximum number of buffered snapshots.
+            overflow: The policy when the buffer is full.
+
+        """
+        self.fetch = fetch
+        self.sites = sites
+        self.interval = interval
+        self.maxsize = maxsize
+        self.overflow = overflow
+
+        self.produced = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+
+        self._buffer: OrderedDict[Hashable, Snapshot] = OrderedDict()
+        self._changed = asyncio.Condition()
+        self._counter = itertools.count()
+        self._tasks: list[asyncio.Task[None]] = []
+        self._error: Exception | None = None
+
+    def __len__(self) -> int:
+        """Return the number of buffered snapshots."""
+        return len(self._buffer)
+
+    def start(self) -> None:
+        """Start polling the sites."""
+        if not self._tasks:
+            self._tasks = [
+                asyncio.create_task(self._produce(public_key))
+                for public_key in self.sites
+            ]
+
+    async def _produce(self, public_key: str) -> None:
+        """Poll a site and put its snapshots into the buffer."""
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            try:
+                snapshot = await self.fetch(public_key)
+            except AutarcoError:
+                self.errors += 1
+            except Exception as err:
+                async with self._changed:
+                    self._error = err
+                    self._changed.notify_all()
+                raise
+            else:
+                await self._put(snapshot)
+            await asyncio.sleep(max(0.0, started + self.interval - loop.time()))
+
+    async def _put(self, snapshot: Snapshot) -> None:
+        """Put a snapshot into the buffer, following the overflow policy."""
+        async with self._changed:
+            if self.overflow is OverflowPolicy.COALESCE:
+                if snapshot.public_key in self._buffer:
+                    self._buffer[snapshot.public_key] = snapshot
+                    self.coalesced += 1
+                    return
+                key: Hashable = snapshot.public_key
+            else:
+                key = next(self._counter)
+
+            if self.overflow is OverflowPolicy.BLOCK:
+                await self._changed.wait_for(lambda: len(self._buffer) < self.maxsize)
+            elif len(self._buffer) >= self.maxsize:
+                self._buffer.popitem(last=False)
+                self.dropped += 1
+            self._buffer[key] = snapshot
+            self.produced += 1
+            self._changed.notify_all()
+
+    async def get(self) -> Snapshot:
+        """Wait for the next snapshot.
+
+        Returns
+        -------
+            The oldest buffered Snapshot object.
+
+        Raises
+        ------
+            Exception: The unexpected error that stopped a producer.
+
+        """
+        self.start()
+        async with self._changed:
+            await self._changed.wait_for(
+                lambda: bool(self._buffer) or self._error is not None
+            )
+            if self._error is not None:
+                raise self._error
+            _, snapshot = self._buffer.popitem(last=False)
+            self._changed.notify_all()
+        self.last_lag = asyncio.get_running_loop().time() - snapshot.fetched_at
+        self.max_lag = max(self.max_lag, self.last_lag)
+        return snapshot
+
+    def __aiter__(self) -> Self:
+        """Return the stream as asynchronous iterator."""
+        return self
+
+    async def __anext__(self) -> Snapshot:
+        """Return the next snapshot."""
+        return await self.get()
+
+    async def close(self) -> None:
+        """Stop polling the sites."""
+        for task in self._tasks:
+            task.cancel()
+        # The error of a stopped producer was already raised by `get`.
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def __aenter__(self) -> Self:
+        """Async enter.
+
+        Returns
+        -------
+            The SnapshotStream object.
+
+        """
+        self.start()
+        return self
+
+    async def __aexit__(self, *_exc_info: object) -> None:
+        """Async exit.
+
+        Args:
+        ----
+            _exc_info: Exec type.
+
+        """
+        await self.close()
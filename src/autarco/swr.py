@@ -0,0 +1,124 @@
+"""Stale-while-revalidate reads for the Autarco API."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any
+
+from .exceptions import AutarcoError
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from .autarco import Autarco
+    from .models import Battery, Solar
+
+
+@dataclass
+class Cached[T]:
+    """Object representing a cached API answer with its staleness."""
+
+    value: T
+    age: float
+    stale: bool
+    error: AutarcoError | None = None
+
+
+@dataclass
+class StaleWhileRevalidate:
+    """Answer reads from the last known object, refreshing in the background.
+
+    Objects younger than `fresh_for` seconds are returned as is. Older objects
+    are still returned immediately, marked as stale, while a single background
+    refresh per site endpoint updates the cache. Once an object is older than
+    `max_stale`, for example because refreshes keep failing, the read waits
+    for a refresh and raises its error.
+    """
+
+    client: Autarco
+    fresh_for: float = 5.0
+    max_stale: float = 300.0
+    clock: Callable[[], float] = time.monotonic
+
+    _entries: dict[tuple[str, str], tuple[Any, float]] = field(default_factory=dict)
+    _errors: dict[tuple[str, str], AutarcoError] = field(default_factory=dict)
+    _refreshing: dict[tuple[str, str], asyncio.Task[Any]] = field(default_factory=dict)
+
+    async def get_solar(self, public_key: str) -> Cached[Solar]:
+        """Get the solar production from a site, possibly stale.
+
+        Args:
+        ----
+            public_key: The public key from your site.
+
+        Returns:
+        -------
+            A Cached object with a Solar object.
+
+        """
+        return await self._get(public_key, "solar")
+
+    async def get_battery(self, public_key: str) -> Cached[Battery]:
+        """Get the battery information from a site, possibly stale.
+
+        Args:
+        ----
+            public_key: The public key from your site.
+
+        Returns:
+        -------
+            A Cached object with a Battery object.
+
+        """
+        return await self._get(public_key, "battery")
+
+    async def _get(self, public_key: str, endpoint: str) -> Cached[Any]:
+        """Get a cached object, refreshing it when needed."""
+        key = (public_key, endpoint)
+        if key in self._entries:
+            value, fetched_at = self._entries[key]
+            age = self.clock() - fetched_at
+            if age <= self.fresh_for:
+                return Cached(value=value, age=age, stale=False)
+            if age <= self.max_stale:
+                self._refresh(key)
+                return Cached(
+                    value=value, age=age, stale=True, error=self._errors.get(key)
+                )
+        value = await asyncio.shield(self._refresh(key))
+        return Cached(value=value, age=0.0, stale=False)
+
+    def _refresh(self, key: tuple[str, str]) -> asyncio.Task[Any]:
+        """Start a refresh of a site endpoint, unless one is running."""
+        if (task := self._refreshing.get(key)) is None:
+            task = asyncio.create_task(self._fetch(key))
+            self._refreshing[key] = task
+            task.add_done_callback(lambda done: self._done(key, done))
+        return task
+
+    def _done(self, key: tuple[str, str], task: asyncio.Task[Any]) -> None:
+        """Forget a finished refresh, its error is kept in `_errors`."""
+        self._refreshing.pop(key, None)
+        if not task.cancelled():
+            task.exception()
+
+    async def _fetch(self, key: tuple[str, str]) -> Any:
+        """Fetch a site endpoint and store the result."""
+        public_key, endpoint = key
+        try:
+            value = await getattr(self.client, f"get_{endpoint}")(public_key)
+        except AutarcoError as exception:
+            self._errors[key] = exception
+            raise
+        self._entries[key] = (value, self.clock())
+        self._errors.pop(key, None)
+        return value
+
+    async def close(self) -> None:
+        """Cancel the running background refreshes."""
+        tasks = list(self._refreshing.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -1,9 +1,53 @@
 """Asynchronous Python client for the Autarco API."""
 
+from datetime import UTC, datetime
 from pathlib import Path
 
+import pytest
+from aresponses import ResponsesMockServer
+
+from autarco import Solar, autarco
+
+# The day of the power graph in the power.json fixture.
+POWER_DAY = datetime(2024, 7, 11, 13, tzinfo=UTC)
+
 
 def load_fixtures(filename: str) -> str:
     """Load a fixture."""
     path = Path(__file__).parent / "fixtures" / filename
     return path.read_text()
+
+
+def add_response(aresponses: ResponsesMockServer, path: str, text: str) -> None:
+    """Add a response of the Autarco API, at a path below /api/site/."""
+    aresponses.add(
+        "my.autarco.com",
+        f"/api/site/{path}",
+        "GET",
+        aresponses.Response(
+            text=text,
+            status=200,
+            headers={"Content-Type": "application/json; charset=utf-8"},
+        ),
+    )
+
+
+def make_solar(power: int, today: int = 1) -> Solar:
+    """Create a Solar object."""
+    return Solar(
+        power_production=power,
+        energy_production_today=today,
+        energy_production_month=10,
+        energy_production_total=100,
+    )
+
+
+def freeze_time(monkeypatch: pytest.MonkeyPatch, now: datetime = POWER_DAY) -> None:
+    """Set the current time of the client."""
+
+    class FrozenDatetime(datetime):
+        @classmethod
+        def now(cls, tz: object = None) -> datetime:  # noqa: ARG003
+            return now
+
+    monkeypatch.setattr(autarco, "datetime", FrozenDatetime)
@@ -5,7 +5,7 @@ from collections.abc import AsyncGenerator
 import pytest
 from aiohttp import ClientSession
 
-from autarco import Autarco
+from autarco import Autarco, _compat
 
 
 @pytest.fixture(name="autarco_client")
@@ -18,3 +18,15 @@ async def client() -> AsyncGenerator[Autarco, None]:
         ) as autarco_client,
     ):
         yield autarco_client
+
+
+@pytest.fixture(name="vectorized", params=[True, False], ids=["numpy", "python"])
+def vectorized_fixture(
+    request: pytest.FixtureRequest, monkeypatch: pytest.MonkeyPatch
+) -> bool:
+    """Run a test with NumPy and with the pure-Python fallback."""
+    if request.param:
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(_compat, "np", None)
+    return bool(request.param)
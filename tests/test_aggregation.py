@@ -0,0 +1,98 @@
+"""Test the fleet-wide aggregation."""
+
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from autarco import Battery, FleetAggregator, Stats
+from autarco.aggregation import percentile, trapezoid
+from autarco.models import EnergyResponse, Graphs, PowerResponse
+
+from . import load_fixtures, make_solar
+
+
+def _battery(soc: int) -> Battery:
+    """Create a Battery object."""
+    return Battery(
+        flow_now=0,
+        net_charged_now=0,
+        state_of_charge=soc,
+        discharged_today=0,
+        discharged_month=0,
+        discharged_total=0,
+        charged_today=0,
+        charged_month=0,
+        charged_total=0,
+    )
+
+
+@pytest.mark.usefixtures("vectorized")
+def test_summary() -> None:
+    """Test the totals, means and percentiles of a column."""
+    aggregator = FleetAggregator(percentiles=(50, 90))
+    aggregator.add_many([make_solar(power, 2) for power in (100, 400, 200, 300)])
+    aggregator.add_many([_battery(40), _battery(60)])
+
+    power = aggregator.summary("power_production")
+    assert power.count == 4
+    assert power.total == 1000
+    assert power.mean == 250
+    assert (power.minimum, power.maximum) == (100, 400)
+    assert power.percentiles == pytest.approx({50: 250, 90: 370})
+
+    assert aggregator.summary("energy_production_today").total == 8
+    assert aggregator.summary("state_of_charge").mean == 50
+    assert aggregator.summary("unknown") == aggregator.summary("other")
+    assert aggregator.summary("unknown").count == 0
+
+
+@pytest.mark.usefixtures("vectorized")
+def test_curve() -> None:
+    """Test the graph series are summed per timestamp."""
+    first = datetime.fromisoformat("2024-07-11 12:00:00")
+    second = datetime.fromisoformat("2024-07-11 12:15:00")
+    aggregator = FleetAggregator()
+    aggregator.add_stats(
+        Stats(
+            graphs=Graphs(
+                pv_power={
+                    "1": {second: 20, first: 10},
+                    "2": {first: 5, second: None},
+                }
+            ),
+            kpis={},
+        )
+    )
+    aggregator.add_stats(EnergyResponse.from_json(load_fixtures("energy.json")).stats)
+    aggregator.add_stats(Stats(graphs=Graphs(pv_power={"3": {first: 1}}), kpis={}))
+
+    assert aggregator.curve() == {first: 16, second: 20}
+    energy = aggregator.curve("pv_energy")
+    assert len(energy) == 29
+    assert next(iter(energy)) == date(2024, 2, 1)
+    assert FleetAggregator().curve() == {}
+
+
+def test_percentile() -> None:
+    """Test the pure-Python percentile matches NumPy."""
+    np = pytest.importorskip("numpy")
+    values = [1.0, 3.0, 4.0, 10.0, 12.5]
+    for q in (0, 25, 50, 95, 100):
+        assert percentile(values, q) == pytest.approx(np.percentile(values, q))
+
+
+@pytest.mark.usefixtures("vectorized")
+def test_trapezoid() -> None:
+    """Test the power curve integration skips missing samples and gaps."""
+    start = datetime.fromisoformat("2024-07-11 12:00:00")
+    timestamps = [start + timedelta(minutes=minutes) for minutes in (0, 15, 30, 45, 90)]
+    values = [1000, 2000, None, 2000, 2000]
+
+    # Only 12:00-12:15 and 12:45-13:30, the intervals around None are skipped.
+    assert trapezoid(timestamps, values) == pytest.approx(0.375 + 1.5)
+    assert trapezoid(timestamps, values, timedelta(minutes=15)) == pytest.approx(0.375)
+    assert trapezoid([], []) == 0
+
+    stats = PowerResponse.from_json(load_fixtures("power.json")).stats
+    assert stats.integrate_power() == pytest.approx({"380016531035": 6.0505})
+    assert Stats(graphs=Graphs(), kpis={}).integrate_power() == {}
@@ -0,0 +1,101 @@
+"""Test the circuit breaker."""
+
+# pylint: disable=protected-access
+import pytest
+from aiohttp import ClientSession
+from aresponses import ResponsesMockServer
+
+from autarco import (
+    Autarco,
+    AutarcoCircuitOpenError,
+    AutarcoConnectionError,
+    BreakerConfig,
+    BreakerState,
+    CircuitBreaker,
+)
+from autarco.autarco import _endpoint
+
+
+def test_breaker_states() -> None:
+    """Test the breaker opens, probes and closes again."""
+    now = [0.0]
+    breaker = CircuitBreaker(
+        failure_threshold=2, reset_timeout=10, clock=lambda: now[0]
+    )
+    assert breaker.allow()
+    breaker.record(failed=True)
+    assert breaker.state is BreakerState.CLOSED
+    breaker.record(failed=True)
+    assert breaker.state is BreakerState.OPEN
+    assert not breaker.allow()
+
+    # A single probe is let through after the reset timeout
+    now[0] = 10
+    assert breaker.allow()
+    assert breaker.state is BreakerState.HALF_OPEN
+    assert not breaker.allow()
+    breaker.record(failed=True)
+    assert breaker.state is BreakerState.OPEN
+    assert breaker.opened_at == 10
+
+    # A cancelled probe releases the breaker for another probe
+    now[0] = 20
+    assert breaker.allow()
+    breaker.record(failed=None)
+    assert breaker.allow()
+    breaker.record(failed=False)
+    assert breaker.state is BreakerState.CLOSED
+    assert breaker.failures == 0
+
+
+async def test_breaker_in_request(aresponses: ResponsesMockServer) -> None:
+    """Test a site endpoint fails fast once its breaker is open."""
+    aresponses.add(
+        "my.autarco.com",
+        "/api/site/fake_key/kpis/power",
+        "GET",
+        aresponses.Response(status=500),
+        repeat=2,
+    )
+    aresponses.add(
+        "my.autarco.com",
+        "/api/site/fake_key/power",
+        "GET",
+        aresponses.Response(status=404),
+        repeat=2,
+    )
+    async with ClientSession() as session:
+        client = Autarco(
+            email="test@autarco.com",
+            password="energy",
+            session=session,
+            breaker=BreakerConfig(threshold=2),
+        )
+        for _ in range(2):
+            with pytest.raises(AutarcoConnectionError):
+                await client._request("fake_key/kpis/power")
+        with pytest.raises(AutarcoCircuitOpenError):
+            await client._request("fake_key/kpis/power")
+
+        # A response from the API, such as 404, does not open the breaker
+        for _ in range(2):
+            with pytest.raises(AutarcoConnectionError):
+                await client._request("fake_key/power")
+
+        assert client.breaker_states == {
+            ("fake_key", "{public_key}/kpis/power"): BreakerState.OPEN,
+            ("fake_key", "{public_key}/power"): BreakerState.CLOSED,
+        }
+
+
+def test_endpoint_template() -> None:
+    """Test request URIs are split into the site and endpoint template."""
+    assert _endpoint("") == ("", "")
+    assert _endpoint("fake_key/") == ("fake_key", "{public_key}/")
+    assert _endpoint("fake_key/kpis/energy") == ("fake_key", "{public_key}/kpis/energy")
+
+
+def test_breaker_disabled(autarco_client: Autarco) -> None:
+    """Test no breakers are created by default."""
+    assert autarco_client._get_breaker("fake_key/kpis/power") is None
+    assert autarco_client.breaker_states == {}
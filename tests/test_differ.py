@@ -0,0 +1,66 @@
+"""Test the change detection between polls."""
+
+from autarco import Inverter, SnapshotDiffer
+
+from . import make_solar
+
+
+def _inverter(power: int, health: str = "OK") -> Inverter:
+    """Create an Inverter object."""
+    return Inverter(
+        serial_number="123",
+        out_ac_power=power,
+        out_ac_energy_total=6605,
+        grid_turned_off=False,
+        health=health,
+    )
+
+
+def test_diff_fields() -> None:
+    """Test only the changed fields are emitted."""
+    differ = SnapshotDiffer()
+    delta = differ.diff("site", make_solar(100))
+    assert delta is not None
+    assert delta.is_new
+    assert delta.model == "Solar"
+    assert delta.changes["power_production"] == 100
+    assert len(delta.changes) == 4
+
+    assert differ.diff("site", make_solar(100)) is None
+
+    delta = differ.diff("site", make_solar(200, today=2))
+    assert delta is not None
+    assert not delta.is_new
+    assert delta.changes == {"power_production": 200, "energy_production_today": 2}
+    assert delta.previous == {"power_production": 100, "energy_production_today": 1}
+
+
+def test_diff_inverters() -> None:
+    """Test inverters are compared per inverter id."""
+    differ = SnapshotDiffer()
+    assert (
+        len(differ.diff_inverters("site", {"1": _inverter(1), "2": _inverter(2)})) == 2
+    )
+    deltas = differ.diff_inverters(
+        "site", {"1": _inverter(1), "2": _inverter(2, health="ERROR")}
+    )
+    assert len(deltas) == 1
+    assert deltas[0].key == "2"
+    assert deltas[0].changes == {"health": "ERROR"}
+
+
+def test_bounded_store() -> None:
+    """Test the least recently updated snapshot is evicted."""
+    differ = SnapshotDiffer(max_snapshots=2)
+    differ.diff("a", make_solar(1))
+    differ.diff("b", make_solar(1))
+    differ.diff("a", make_solar(1))
+    differ.diff("c", make_solar(1))
+    assert len(differ) == 2
+    assert differ.diff("a", make_solar(1)) is None
+    delta = differ.diff("b", make_solar(1))
+    assert delta is not None
+    assert delta.is_new
+
+    differ.forget("b")
+    assert len(differ) == 1
@@ -0,0 +1,129 @@
+"""Test the streaming export of statistics."""
+
+import io
+import json
+import sys
+from datetime import date, datetime
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from autarco import (
+    AutarcoError,
+    Stats,
+    StatsRow,
+    iter_fleet_rows,
+    iter_rows,
+    write_arrow,
+    write_csv,
+    write_ndjson,
+    write_parquet,
+)
+from autarco.models import EnergyResponse, PowerResponse
+
+from . import load_fixtures
+
+
+@pytest.fixture(name="power_stats")
+def power_stats_fixture() -> Stats:
+    """Return the power statistics fixture."""
+    return PowerResponse.from_json(load_fixtures("power.json")).stats
+
+
+@pytest.fixture(name="energy_stats")
+def energy_stats_fixture() -> Stats:
+    """Return the energy statistics fixture."""
+    return EnergyResponse.from_json(load_fixtures("energy.json")).stats
+
+
+def test_iter_rows(power_stats: Stats, energy_stats: Stats) -> None:
+    """Test rows are streamed from the graphs."""
+    rows = list(iter_rows("site", power_stats))
+    assert len(rows) == 51
+    assert rows[0] == StatsRow(
+        "site", "380016531035", datetime.fromisoformat("2024-07-11 00:00:00"), 0
+    )
+    assert list(iter_rows("site", power_stats, "pv_energy")) == []
+
+    fleet = list(
+        iter_fleet_rows([("a", energy_stats), ("b", energy_stats)], "pv_energy")
+    )
+    assert len(fleet) == 58
+    assert fleet[-1] == StatsRow("b", "1802040231290027", date(2024, 2, 29), 0)
+
+    with pytest.raises(ValueError, match="Unknown graph"):
+        list(iter_rows("site", power_stats, "pv_voltage"))
+
+
+def test_write_ndjson(power_stats: Stats) -> None:
+    """Test rows are written as NDJSON in batches."""
+    fp = io.BytesIO()
+    assert write_ndjson(iter_rows("site", power_stats), fp, batch_size=10) == 51
+    lines = fp.getvalue().splitlines()
+    assert len(lines) == 51
+    assert json.loads(lines[40]) == {
+        "site": "site",
+        "inverter": "380016531035",
+        "timestamp": "2024-07-11T10:00:00",
+        "value": 1500,
+    }
+
+
+def test_write_csv(energy_stats: Stats) -> None:
+    """Test rows are written as CSV, with empty missing values."""
+    rows = [
+        *iter_rows("site", energy_stats, "pv_energy"),
+        StatsRow("s", "i", date(2024, 3, 1), None),
+    ]
+    fp = io.StringIO(newline="")
+    assert write_csv(rows, fp, batch_size=7) == 30
+    lines = fp.getvalue().splitlines()
+    assert lines[0] == "site,inverter,timestamp,value"
+    assert lines[1] == "site,1802040231290027,2024-02-01,0"
+    assert lines[-1] == "s,i,2024-03-01,"
+
+
+def test_write_arrow_parquet(
+    power_stats: Stats, energy_stats: Stats, tmp_path: Path
+) -> None:
+    """Test rows are written as Arrow and Parquet record batches."""
+    pa = pytest.importorskip("pyarrow")
+    pq = pytest.importorskip("pyarrow.parquet")
+
+    sink = io.BytesIO()
+    assert write_arrow(iter_rows("site", power_stats), sink, batch_size=20) == 51
+    table = pa.ipc.open_stream(sink.getvalue()).read_all()
+    assert table.num_rows == 51
+    assert table.column("value")[40].as_py() == 1500
+    assert table.schema.field("timestamp").type == pa.timestamp("s")
+
+    path = tmp_path / "power.parquet"
+    assert write_parquet(iter_rows("site", power_stats), path, batch_size=20) == 51
+    assert pq.read_table(path).column_names == [
+        "site",
+        "inverter",
+        "timestamp",
+        "value",
+    ]
+
+    # The timestamp column of energy graphs holds dates
+    path = tmp_path / "energy.parquet"
+    rows = iter_rows("site", energy_stats, "pv_energy")
+    assert write_parquet(rows, path) == 29
+    table = pq.read_table(path)
+    assert table.schema.field("timestamp").type == pa.date32()
+    assert table.column("timestamp")[0].as_py() == date(2024, 2, 1)
+
+    sink = io.BytesIO()
+    assert write_arrow([], sink) == 0
+    assert pa.ipc.open_stream(sink.getvalue()).read_all().num_rows == 0
+
+
+def test_pyarrow_missing(power_stats: Stats) -> None:
+    """Test a clear error is raised when pyarrow is not installed."""
+    with (
+        patch.dict(sys.modules, {"pyarrow": None}),
+        pytest.raises(AutarcoError, match="pyarrow"),
+    ):
+        write_parquet(iter_rows("site", power_stats), io.BytesIO())
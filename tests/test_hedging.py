@@ -0,0 +1,169 @@
+"""Test the hedged requests and latency tracking."""
+
+# pylint: disable=protected-access
+import asyncio
+import gc
+from collections.abc import Awaitable, Callable
+
+import pytest
+from aiohttp import ClientResponse, ClientSession
+from aresponses import Response, ResponsesMockServer
+
+from autarco import (
+    Autarco,
+    AutarcoConnectionError,
+    FairLimiter,
+    HedgeConfig,
+    HedgeStats,
+    LatencyTracker,
+)
+
+TEMPLATE = "{public_key}/kpis/power"
+
+
+def test_latency_tracker() -> None:
+    """Test latency percentiles per endpoint template."""
+    tracker = LatencyTracker(window=4, min_samples=2)
+    tracker.record(TEMPLATE, 1.0)
+    assert tracker.percentile(TEMPLATE, 50) is None
+    for seconds in (2.0, 3.0, 4.0, 5.0):
+        tracker.record(TEMPLATE, seconds)
+    assert tracker.percentile(TEMPLATE, 50) == 3.5
+    assert tracker.percentile("{public_key}/power", 50) is None
+    assert tracker.snapshot((0, 100)) == {TEMPLATE: {0: 2.0, 100: 5.0}}
+
+
+def test_hedge_rate() -> None:
+    """Test hedging is capped to a fraction of the requests."""
+    stats = HedgeStats(max_rate=0.5, requests=4)
+    assert stats.allow()
+    stats.hedged = 2
+    assert not stats.allow()
+
+
+def _slow(
+    delay: float, status: int = 200
+) -> Callable[[ClientResponse], Awaitable[Response]]:
+    """Return a response handler that answers after a delay."""
+
+    async def response_handler(_: ClientResponse) -> Response:
+        await asyncio.sleep(delay)
+        return Response(
+            text='{"pv_now": 1}',
+            status=status,
+            headers={"Content-Type": "application/json"},
+        )
+
+    return response_handler
+
+
+async def _client(session: ClientSession) -> Autarco:
+    """Return a client with hedging enabled and a known latency."""
+    client = Autarco(
+        email="test@autarco.com",
+        password="energy",
+        session=session,
+        hedging=HedgeConfig(),
+        hedge_stats=HedgeStats(max_rate=1.0),
+    )
+    for _ in range(client.latency.min_samples):
+        client.latency.record(TEMPLATE, 0.01)
+    return client
+
+
+async def test_hedge_wins(aresponses: ResponsesMockServer) -> None:
+    """Test a slow request is hedged and the fastest response wins."""
+    aresponses.add("my.autarco.com", "/api/site/fake_key/kpis/power", "GET", _slow(0.5))
+    aresponses.add("my.autarco.com", "/api/site/fake_key/kpis/power", "GET", _slow(0))
+    async with ClientSession() as session:
+        client = await _client(session)
+        assert await client._request("fake_key/kpis/power") == '{"pv_now": 1}'
+    assert client.hedge_stats.requests == 1
+    assert client.hedge_stats.hedged == 1
+    assert client.hedge_stats.hedge_wins == 1
+    # The hedge and the cancelled primary are both recorded.
+    samples = client.latency._samples[TEMPLATE]
+    assert len(samples) == client.latency.min_samples + 2
+    assert samples[-1] >= 0.01
+
+
+async def test_hedge_not_needed(aresponses: ResponsesMockServer) -> None:
+    """Test a fast request is not hedged."""
+    aresponses.add("my.autarco.com", "/api/site/fake_key/kpis/power", "GET", _slow(0))
+    async with ClientSession() as session:
+        client = await _client(session)
+        client.latency = LatencyTracker(min_samples=1)
+        client.latency.record(TEMPLATE, 1.0)
+        await client._request("fake_key/kpis/power")
+    assert client.hedge_stats.hedged == 0
+    assert len(client.latency._samples[TEMPLATE]) == 2
+
+
+async def test_hedge_both_fail(aresponses: ResponsesMockServer) -> None:
+    """Test the error is raised when both requests fail."""
+    for delay in (0.05, 0):
+        aresponses.add(
+            "my.autarco.com",
+            "/api/site/fake_key/kpis/power",
+            "GET",
+            _slow(delay, status=500),
+        )
+    async with ClientSession() as session:
+        client = await _client(session)
+        with pytest.raises(AutarcoConnectionError):
+            await client._request("fake_key/kpis/power")
+    assert client.hedge_stats.hedged == 1
+    assert client.hedge_stats.hedge_wins == 0
+
+
+async def test_hedge_needs_a_slot(aresponses: ResponsesMockServer) -> None:
+    """Test a hedge takes its own slot of the limiter, or is skipped."""
+    for delay in (0.1, 0.1, 0):
+        aresponses.add(
+            "my.autarco.com", "/api/site/fake_key/kpis/power", "GET", _slow(delay)
+        )
+    async with ClientSession() as session:
+        client = await _client(session)
+        client.limiter = FairLimiter(1)
+        await client._request("fake_key/kpis/power")
+        assert client.hedge_stats.no_slot == 1
+        assert client.hedge_stats.hedged == 0
+
+        client.limiter = FairLimiter(2)
+        client.latency = (await _client(session)).latency
+        await client._request("fake_key/kpis/power")
+        assert client.hedge_stats.hedged == 1
+        await asyncio.sleep(0)
+        assert client.limiter.in_use == 0
+
+
+async def test_hedge_loser_error_retrieved(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test the error of a failed request that lost is retrieved."""
+    release = asyncio.Event()
+    hedged = asyncio.Event()
+    calls: list[int] = []
+
+    async def timed_send(*_args: object, **_kwargs: object) -> str:
+        index = len(calls)
+        calls.append(index)
+        if index == 1:
+            hedged.set()
+        await release.wait()
+        if index == 0:
+            msg = "Primary failed"
+            raise AutarcoConnectionError(msg)
+        return "hedge"
+
+    errors: list[dict[str, object]] = []
+    loop = asyncio.get_running_loop()
+    loop.set_exception_handler(lambda _, context: errors.append(context))
+    async with ClientSession() as session:
+        client = await _client(session)
+        monkeypatch.setattr(client, "_timed_send", timed_send)
+        request = asyncio.create_task(client._request("fake_key/kpis/power"))
+        await hedged.wait()
+        release.set()
+        assert await request == "hedge"
+    gc.collect()
+    loop.set_exception_handler(None)
+    assert errors == []
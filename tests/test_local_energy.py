@@ -0,0 +1,107 @@
+"""Test the energy of today from the local power curve."""
+
+# pylint: disable=protected-access
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from aresponses import ResponsesMockServer
+
+from autarco import Autarco, LocalEnergyConfig
+
+from . import add_response, freeze_time, load_fixtures
+
+
+@pytest.fixture(autouse=True)
+def _today(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Set today to the day of the power graph of the fixtures."""
+    freeze_time(monkeypatch)
+
+
+async def test_energy_today_from_api(
+    aresponses: ResponsesMockServer, autarco_client: Autarco
+) -> None:
+    """Test the energy of today is requested without local energy."""
+    add_response(aresponses, "fake_key/power", load_fixtures("power.json"))
+    add_response(aresponses, "fake_key/kpis/energy", load_fixtures("kpis_energy.json"))
+    await autarco_client.get_power_statistics("fake_key")
+    assert await autarco_client.get_energy_today("fake_key") == 8
+    aresponses.assert_plan_strictly_followed()
+
+
+async def test_energy_today_local(
+    aresponses: ResponsesMockServer, autarco_client: Autarco
+) -> None:
+    """Test the energy of today is integrated from the day power curve."""
+    autarco_client.local_energy = LocalEnergyConfig(tolerance=2.5)
+    add_response(aresponses, "fake_key/power", load_fixtures("power.json"))
+    add_response(aresponses, "fake_key/kpis/power", load_fixtures("kpis_power.json"))
+    add_response(aresponses, "fake_key/kpis/energy", load_fixtures("kpis_energy.json"))
+
+    await autarco_client.get_power_statistics("fake_key")
+    assert await autarco_client.get_energy_today("fake_key") == pytest.approx(6.0505)
+
+    # Within the tolerance of pv_today, the power curve is kept.
+    await autarco_client.get_solar("fake_key")
+    assert autarco_client.energy_mismatches == 0
+    assert await autarco_client.get_energy_today("fake_key") == pytest.approx(6.0505)
+    aresponses.assert_plan_strictly_followed()
+
+
+async def test_energy_today_mismatch(
+    aresponses: ResponsesMockServer, autarco_client: Autarco
+) -> None:
+    """Test the power curve is dropped when it does not match pv_today."""
+    autarco_client.local_energy = LocalEnergyConfig()
+    add_response(aresponses, "fake_key/power", load_fixtures("power.json"))
+    add_response(aresponses, "fake_key/kpis/power", load_fixtures("kpis_power.json"))
+    add_response(aresponses, "fake_key/kpis/energy", load_fixtures("kpis_energy.json"))
+    add_response(aresponses, "fake_key/kpis/energy", load_fixtures("kpis_energy.json"))
+
+    await autarco_client.get_power_statistics("fake_key", query_range="day")
+    await autarco_client.get_solar("fake_key")
+    assert autarco_client.energy_mismatches == 1
+    assert await autarco_client.get_energy_today("fake_key") == 8
+    aresponses.assert_plan_strictly_followed()
+
+
+async def test_energy_today_expires(
+    aresponses: ResponsesMockServer, autarco_client: Autarco
+) -> None:
+    """Test the power curve of an earlier day is not used after midnight."""
+    autarco_client.local_energy = LocalEnergyConfig()
+    add_response(aresponses, "fake_key/power", load_fixtures("power.json"))
+    add_response(aresponses, "fake_key/kpis/energy", load_fixtures("kpis_energy.json"))
+
+    await autarco_client.get_power_statistics("fake_key", query_range="day")
+    today, stats = autarco_client._day_power["fake_key"]
+    autarco_client._day_power["fake_key"] = (today - timedelta(days=1), stats)
+    assert await autarco_client.get_energy_today("fake_key") == 8
+    assert "fake_key" not in autarco_client._day_power
+    aresponses.assert_plan_strictly_followed()
+
+
+async def test_energy_today_site_timezone(
+    aresponses: ResponsesMockServer,
+    autarco_client: Autarco,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Test the power curve expires at midnight in the timezone of the site."""
+    autarco_client.local_energy = LocalEnergyConfig()
+    add_response(aresponses, "fake_key/power", load_fixtures("power.json"))
+    add_response(aresponses, "fake_key/", load_fixtures("site.json"))
+    add_response(aresponses, "fake_key/kpis/energy", load_fixtures("kpis_energy.json"))
+    add_response(aresponses, "fake_key/kpis/energy", load_fixtures("kpis_energy.json"))
+
+    await autarco_client.get_power_statistics("fake_key", query_range="day")
+    await autarco_client.get_site("fake_key")
+    assert autarco_client._timezones == {"fake_key": "Europe/Amsterdam"}
+
+    # 23:30 in Amsterdam, still the day of the power curve.
+    freeze_time(monkeypatch, datetime(2024, 7, 11, 21, 30, tzinfo=UTC))
+    assert await autarco_client.get_energy_today("fake_key") == pytest.approx(6.0505)
+
+    # 00:30 in Amsterdam, while it is still the same day in UTC.
+    freeze_time(monkeypatch, datetime(2024, 7, 11, 22, 30, tzinfo=UTC))
+    assert await autarco_client.get_energy_today("fake_key") == 8
+    assert "fake_key" not in autarco_client._day_power
+    aresponses.assert_plan_strictly_followed()
@@ -0,0 +1,107 @@
+"""Test the conversion to the local time of a site."""
+
+import json
+from array import array
+from datetime import UTC, date, datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from autarco import LocalTime, Series, Site
+from autarco.localtime import get_local_time
+from autarco.models import PowerResponse
+
+from . import load_fixtures
+
+
+@pytest.mark.usefixtures("vectorized")
+def test_to_local() -> None:
+    """Test the bulk conversion matches astimezone, across DST changes."""
+    zone = ZoneInfo("Europe/Amsterdam")
+    moments = [
+        datetime(2023, 12, 31, 23, 30, tzinfo=UTC) + timedelta(hours=hours)
+        for hours in range(0, 24 * 400, 7)
+    ]
+    converter = LocalTime("Europe/Amsterdam")
+    local = converter.to_local(array("d", [moment.timestamp() for moment in moments]))
+    expected = [
+        moment.astimezone(zone).replace(tzinfo=UTC).timestamp() for moment in moments
+    ]
+    assert list(local) == expected
+    assert converter.to_local(array("d")) == array("d")
+
+
+@pytest.mark.usefixtures("vectorized")
+def test_from_local() -> None:
+    """Test wall-clock time is converted back to UTC, across DST changes."""
+    zone = ZoneInfo("Europe/Amsterdam")
+    moments = [
+        datetime(2023, 12, 31, 12, tzinfo=zone) + timedelta(days=days)
+        for days in range(400)
+    ]
+    # 02:30 does not exist on the day DST starts, and repeats when it ends.
+    moments += [
+        datetime(2024, 3, 31, 1, 30, tzinfo=zone),
+        datetime(2024, 3, 31, 3, 30, tzinfo=zone),
+        datetime(2024, 10, 27, 2, 30, fold=1, tzinfo=zone),
+    ]
+    converter = LocalTime("Europe/Amsterdam")
+    local = array("d", [moment.replace(tzinfo=UTC).timestamp() for moment in moments])
+    assert list(converter.from_local(local)) == [
+        moment.timestamp() for moment in moments
+    ]
+    assert converter.from_local(array("d")) == array("d")
+
+
+@pytest.mark.usefixtures("vectorized")
+def test_split_days() -> None:
+    """Test a series is bucketed by local day."""
+    converter = get_local_time("America/New_York")
+    start = datetime(2024, 3, 9, 12, tzinfo=UTC).timestamp()
+    series = Series(
+        array("d", [start + 3600 * hours for hours in range(0, 48, 6)]),
+        array("d", range(8)),
+    )
+    days = converter.split_days(series)
+    assert list(days) == [date(2024, 3, 9), date(2024, 3, 10), date(2024, 3, 11)]
+    assert days[date(2024, 3, 9)].values == array("d", [0, 1, 2])
+    assert days[date(2024, 3, 11)].timestamps == series.timestamps[7:]
+    assert converter.split_days(Series(array("d"), array("d"))) == {}
+
+
+@pytest.mark.usefixtures("vectorized")
+def test_power_by_day() -> None:
+    """Test the power graph is split by the local day of the site."""
+    site = Site.from_dict(
+        {
+            **json.loads(load_fixtures("site.json")),
+            **json.loads(load_fixtures("kpis_energy.json")),
+        }
+    )
+    assert site.local_time is get_local_time("Europe/Amsterdam")
+
+    stats = PowerResponse.from_json(load_fixtures("power.json")).stats
+    ((inverter_id, days),) = stats.power_by_day(site.timezone).items()
+    assert inverter_id == "380016531035"
+    assert list(days) == [date(2024, 7, 11)]
+    assert len(days[date(2024, 7, 11)].values) == 51
+
+
+@pytest.mark.usefixtures("vectorized")
+def test_power_by_day_full_day() -> None:
+    """Test the samples of a whole day stay on that local day."""
+    data = json.loads(load_fixtures("power.json"))
+    start = datetime(2024, 7, 11)  # noqa: DTZ001
+    data["stats"]["graphs"]["pv_power"]["380016531035"] = {
+        f"{start + timedelta(minutes=15 * quarter):%Y-%m-%d %H:%M:%S}": quarter
+        for quarter in range(96)
+    }
+    stats = PowerResponse.from_dict(data).stats
+
+    ((day, series),) = stats.power_by_day("Europe/Amsterdam")["380016531035"].items()
+    assert day == date(2024, 7, 11)
+    assert series.values == array("d", range(96))
+    assert (
+        series.timestamps[0]
+        == datetime(2024, 7, 11, tzinfo=ZoneInfo("Europe/Amsterdam")).timestamp()
+    )
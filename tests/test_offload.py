@@ -0,0 +1,56 @@
+"""Test offloading the parsing of large responses."""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+from aresponses import ResponsesMockServer
+
+from autarco import Autarco, LoopLagMonitor, OffloadConfig, Stats
+
+from . import add_response, load_fixtures
+
+
+async def test_parse_offloaded(
+    aresponses: ResponsesMockServer,
+    autarco_client: Autarco,
+) -> None:
+    """Test large responses are parsed in the executor."""
+    add_response(aresponses, "fake_key/power", load_fixtures("power.json"))
+    add_response(aresponses, "fake_key/power", load_fixtures("power.json"))
+    inline: Stats = await autarco_client.get_power_statistics("fake_key")
+
+    with ThreadPoolExecutor(1) as executor:
+        autarco_client.offload = OffloadConfig(threshold=100, executor=executor)
+        with patch.object(executor, "submit", wraps=executor.submit) as submit:
+            offloaded = await autarco_client.get_power_statistics("fake_key")
+    assert submit.call_count == 1
+    assert offloaded == inline
+
+
+async def test_parse_small_inline(
+    aresponses: ResponsesMockServer,
+    autarco_client: Autarco,
+) -> None:
+    """Test responses below the threshold are parsed on the event loop."""
+    add_response(aresponses, "fake_key/power", load_fixtures("power.json"))
+    autarco_client.offload = OffloadConfig(threshold=1_000_000)
+    with patch.object(asyncio.get_running_loop(), "run_in_executor") as executor:
+        await autarco_client.get_inverters("fake_key")
+    executor.assert_not_called()
+
+
+async def test_loop_lag_monitor() -> None:
+    """Test a blocked event loop shows up as lag."""
+    async with LoopLagMonitor(interval=0.01) as monitor:
+        await asyncio.sleep(0)
+        time.sleep(0.05)  # noqa: ASYNC251
+        await asyncio.sleep(0.02)
+    assert monitor.samples >= 1
+    assert monitor.maximum >= 0.03
+    assert 0 < monitor.mean <= monitor.maximum
+
+    monitor.reset()
+    assert monitor.mean == 0
+    await monitor.stop()
@@ -0,0 +1,80 @@
+"""Test the pool of Autarco clients."""
+
+# pylint: disable=protected-access
+import asyncio
+
+import pytest
+from aresponses import ResponsesMockServer
+
+from autarco import AutarcoPool, FairLimiter
+
+
+async def test_fair_limiter() -> None:
+    """Test freed slots go round-robin over the waiting accounts."""
+    limiter = FairLimiter(1)
+    order: list[str] = []
+
+    async def request(account: str) -> None:
+        async with limiter.slot(account):
+            order.append(account)
+            await asyncio.sleep(0)
+
+    await limiter.acquire("a")
+    tasks = [asyncio.create_task(request(account)) for account in "aaab"]
+    await asyncio.sleep(0)
+    assert limiter.in_use == 1
+    assert limiter.waiting == 4
+
+    limiter.release()
+    await asyncio.gather(*tasks)
+    assert order == ["a", "b", "a", "a"]
+    assert limiter.in_use == 0
+
+
+async def test_fair_limiter_cancel() -> None:
+    """Test a cancelled waiter gives up its place in the queue."""
+    limiter = FairLimiter(1)
+    await limiter.acquire("a")
+    waiter = asyncio.create_task(limiter.acquire("b"))
+    await asyncio.sleep(0)
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    assert limiter.waiting == 0
+
+    # A waiter cancelled right after getting the slot hands it back
+    waiter = asyncio.create_task(limiter.acquire("b"))
+    await asyncio.sleep(0)
+    limiter.release()
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    assert limiter.in_use == 0
+
+
+async def test_pool(aresponses: ResponsesMockServer) -> None:
+    """Test clients of the pool share one session and limiter."""
+    aresponses.add(
+        "my.autarco.com",
+        "/api/site/test",
+        "GET",
+        aresponses.Response(
+            status=200,
+            headers={"Content-Type": "application/json"},
+        ),
+    )
+    async with AutarcoPool(max_concurrency=2) as pool:
+        first = pool.client("one@autarco.com", "energy")
+        second = pool.client("two@autarco.com", "energy")
+        assert pool.client("one@autarco.com", "energy") is first
+        assert pool.clients == [first, second]
+        assert first.session is second.session
+        assert first.limiter is second.limiter is pool.limiter
+        assert not first._close_session
+
+        await first._request("test")
+        session = pool.session
+        assert session is not None
+        assert pool.limiter.in_use == 0
+    assert session.closed
+    assert pool.clients == []
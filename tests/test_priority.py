@@ -0,0 +1,107 @@
+"""Test the priority-aware request scheduler."""
+
+# pylint: disable=protected-access
+import asyncio
+
+import pytest
+from aiohttp import ClientSession
+from aresponses import ResponsesMockServer
+
+from autarco import (
+    Autarco,
+    AutarcoRequestDroppedError,
+    Priority,
+    RequestScheduler,
+    request_priority,
+)
+from autarco.priority import current_priority
+
+
+async def test_interactive_first() -> None:
+    """Test queued interactive requests go before background requests."""
+    scheduler = RequestScheduler(limit=1, min_remaining=0)
+    deadline = asyncio.get_running_loop().time() + 10
+    order: list[str] = []
+
+    async def request(name: str, priority: Priority) -> None:
+        async with scheduler.slot(priority, deadline):
+            order.append(name)
+            await asyncio.sleep(0)
+
+    await scheduler.acquire(Priority.BACKGROUND, deadline)
+    tasks = [
+        asyncio.create_task(request("backfill", Priority.BACKGROUND)),
+        asyncio.create_task(request("solar", Priority.INTERACTIVE)),
+    ]
+    await asyncio.sleep(0)
+    scheduler.release(Priority.BACKGROUND)
+    await asyncio.gather(*tasks)
+    assert order == ["solar", "backfill"]
+
+
+async def test_class_caps() -> None:
+    """Test background requests are limited to their own cap."""
+    scheduler = RequestScheduler(limit=3, min_remaining=0)
+    assert scheduler.caps == {Priority.BACKGROUND: 1}
+    deadline = asyncio.get_running_loop().time() + 10
+
+    await scheduler.acquire(Priority.BACKGROUND, deadline)
+    waiter = asyncio.create_task(scheduler.acquire(Priority.BACKGROUND, deadline))
+    await scheduler.acquire(Priority.INTERACTIVE, deadline)
+    await scheduler.acquire(Priority.INTERACTIVE, deadline)
+    assert scheduler.running == {Priority.INTERACTIVE: 2, Priority.BACKGROUND: 1}
+    assert not waiter.done()
+
+    scheduler.release(Priority.BACKGROUND)
+    await waiter
+    assert scheduler.running[Priority.BACKGROUND] == 1
+
+    # Cancelled waiters leave the queue
+    waiter = asyncio.create_task(scheduler.acquire(Priority.BACKGROUND, deadline))
+    await asyncio.sleep(0)
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    scheduler.release(Priority.BACKGROUND)
+    assert scheduler.running[Priority.BACKGROUND] == 0
+
+
+async def test_deadline_drop() -> None:
+    """Test queued requests are dropped when they can no longer finish."""
+    scheduler = RequestScheduler(limit=1, min_remaining=0.5)
+    loop = asyncio.get_running_loop()
+    await scheduler.acquire(Priority.INTERACTIVE, loop.time() + 10)
+    with pytest.raises(AutarcoRequestDroppedError):
+        await scheduler.acquire(Priority.BACKGROUND, loop.time() + 0.55)
+    assert scheduler.dropped[Priority.BACKGROUND] == 1
+
+
+def test_request_priority() -> None:
+    """Test the priority can be overridden for a block of requests."""
+    assert current_priority(Priority.INTERACTIVE) is Priority.INTERACTIVE
+    with request_priority(Priority.BACKGROUND):
+        assert current_priority(Priority.INTERACTIVE) is Priority.BACKGROUND
+    assert current_priority(Priority.BACKGROUND) is Priority.BACKGROUND
+
+
+async def test_scheduler_in_request(aresponses: ResponsesMockServer) -> None:
+    """Test requests pass through the scheduler of the client."""
+    aresponses.add(
+        "my.autarco.com",
+        "/api/site/test",
+        "GET",
+        aresponses.Response(
+            status=200,
+            headers={"Content-Type": "application/json"},
+        ),
+    )
+    scheduler = RequestScheduler(limit=1)
+    async with ClientSession() as session:
+        client = Autarco(
+            email="test@autarco.com",
+            password="energy",
+            session=session,
+            request_scheduler=scheduler,
+        )
+        await client._request("test", priority=Priority.BACKGROUND)
+    assert scheduler.running == {Priority.INTERACTIVE: 0, Priority.BACKGROUND: 0}
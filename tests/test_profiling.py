@@ -0,0 +1,158 @@
+"""Test the profiling mode of the Autarco client."""
+
+import asyncio
+import pstats
+from pathlib import Path
+
+import pytest
+from aiohttp import ClientSession
+from aresponses import ResponsesMockServer
+
+from autarco import Autarco, Profiler
+from autarco.profiling import collapse
+
+from . import add_response, load_fixtures
+
+
+async def test_profiling(aresponses: ResponsesMockServer, tmp_path: Path) -> None:
+    """Test the public methods are profiled and dumped per window."""
+    add_response(aresponses, "", load_fixtures("account.json"))
+    add_response(aresponses, "", load_fixtures("account.json"))
+    profiler = Profiler(tmp_path, window=3600)
+    async with ClientSession() as session:
+        client = Autarco(
+            email="test@autarco.com",
+            password="energy",
+            session=session,
+            profiler=profiler,
+        )
+        assert client.get_account.__name__ == "get_account"
+        await client.get_account()
+        await client.get_account()
+        assert profiler.calls == {"get_account": 2}
+        assert profiler.windows == 0
+        await client.close()
+
+    assert profiler.windows == 1
+    _assert_dumped(tmp_path)
+
+
+def _assert_dumped(tmp_path: Path) -> None:
+    """Assert the statistics of the first window are dumped."""
+    names = {path.name for path in tmp_path.iterdir()}
+    assert names == {
+        "get_account-0.pstats",
+        "get_account-0.folded",
+        "allocations-0.tracemalloc",
+    }
+    stats = pstats.Stats(str(tmp_path / "get_account-0.pstats"))
+    entries = stats.stats  # ty:ignore[unresolved-attribute]
+    assert any(name == "get_account" for _, _, name in entries)
+    folded = (tmp_path / "get_account-0.folded").read_text().splitlines()
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in folded)
+    assert any("get_account (autarco.py:" in line for line in folded)
+
+
+async def test_profiling_shared(
+    aresponses: ResponsesMockServer, monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    """Test clients profiling into the same directory share a profiler."""
+    add_response(aresponses, "", load_fixtures("account.json"))
+    add_response(aresponses, "", load_fixtures("account.json"))
+    monkeypatch.setenv("AUTARCO_PROFILE", str(tmp_path))
+    async with ClientSession() as session:
+        first, second = (
+            Autarco(email="test@autarco.com", password="energy", session=session)
+            for _ in range(2)
+        )
+        profiler = first.profiler
+        assert profiler is not None
+        assert second.profiler is profiler
+        await first.get_account()
+        await second.get_account()
+        assert profiler.calls == {"get_account": 2}
+        await first.close()
+        await second.close()
+
+    assert profiler.windows == 1
+    _assert_dumped(tmp_path)
+
+
+async def test_profiling_stop_active(tmp_path: Path) -> None:
+    """Test stopping leaves the window of a running call alone."""
+    profiler = Profiler(tmp_path, window=3600)
+
+    async def work() -> None:
+        profiler.stop()
+        await asyncio.sleep(0)
+
+    await profiler.wrap("work", work)()
+    assert profiler.windows == 0
+    profiler.stop()
+    assert profiler.windows == 1
+
+
+async def test_profiling_window(tmp_path: Path) -> None:
+    """Test concurrent calls are skipped, and windows are dumped on time."""
+    profiler = Profiler(tmp_path, window=0)
+
+    async def work() -> None:
+        await asyncio.sleep(0)
+
+    wrapped = profiler.wrap("work", work)
+    await asyncio.gather(wrapped(), wrapped())
+    assert profiler.calls == {"work": 1}
+    assert profiler.skipped == 1
+    assert profiler.windows == 1
+
+    await wrapped()
+    profiler.stop()
+    assert profiler.windows == 2
+
+
+def test_collapse() -> None:
+    """Test the own time of a function is split over its callers."""
+
+    class FakeStats(pstats.Stats):
+        def __init__(self) -> None:
+            self.stats = {
+                ("a.py", 1, "main"): (1, 1, 0.1, 1.0, {}),
+                ("a.py", 2, "left"): (
+                    1,
+                    1,
+                    0.2,
+                    0.2,
+                    {("a.py", 1, "main"): (1, 1, 0.2, 0.2)},
+                ),
+                ("a.py", 3, "leaf"): (
+                    2,
+                    2,
+                    0.6,
+                    0.6,
+                    {
+                        ("a.py", 1, "main"): (1, 1, 0.3, 0.3),
+                        ("a.py", 2, "left"): (1, 1, 0.3, 0.3),
+                    },
+                ),
+            }
+
+    assert collapse(FakeStats()) == {
+        "main (a.py:1)": 100000,
+        "main (a.py:1);left (a.py:2)": 200000,
+        "main (a.py:1);leaf (a.py:3)": 300000,
+        "main (a.py:1);left (a.py:2);leaf (a.py:3)": 300000,
+    }
+
+
+def test_profiling_off(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    """Test the methods are only wrapped when profiling is enabled."""
+    monkeypatch.delenv("AUTARCO_PROFILE", raising=False)
+    client = Autarco(email="test@autarco.com", password="energy")
+    assert client.profiler is None
+    assert "get_account" not in vars(client)
+
+    monkeypatch.setenv("AUTARCO_PROFILE", str(tmp_path))
+    client = Autarco(email="test@autarco.com", password="energy")
+    assert client.profiler == Profiler(tmp_path)
+    assert "get_account" in vars(client)
+    assert "close" not in vars(client)
@@ -0,0 +1,131 @@
+"""Test the indexed fleet registry."""
+
+import json
+
+import pytest
+from aresponses import ResponsesMockServer
+
+from autarco import (
+    Autarco,
+    AutarcoConnectionError,
+    FleetRegistry,
+    Inverter,
+    InverterIndex,
+)
+
+from . import add_response, load_fixtures
+
+
+def _add_site(
+    aresponses: ResponsesMockServer, public_key: str, *, has_battery: bool
+) -> None:
+    """Add the site and energy responses of a site."""
+    site = json.loads(load_fixtures("site.json"))
+    site["public_key"] = public_key
+    site["has_battery"] = has_battery
+    add_response(aresponses, f"{public_key}/", json.dumps(site))
+    add_response(
+        aresponses, f"{public_key}/kpis/energy", load_fixtures("kpis_energy.json")
+    )
+
+
+async def test_refresh_and_select(
+    aresponses: ResponsesMockServer,
+    autarco_client: Autarco,
+) -> None:
+    """Test sites are loaded, indexed and refreshed incrementally."""
+    account = json.loads(load_fixtures("account.json"))
+    account["data"][1]["site_id"] = 1001
+    account["data"][1]["health"] = "ERROR"
+    add_response(aresponses, "", json.dumps(account))
+    _add_site(aresponses, "site_key_1", has_battery=True)
+    _add_site(aresponses, "site_key_2", has_battery=True)
+
+    registry = FleetRegistry(autarco_client)
+    assert await registry.refresh() == ({"site_key_1", "site_key_2"}, set())
+    assert len(registry) == 2
+    assert "site_key_1" in registry
+    assert registry.details["site_key_1"].has_battery
+    registry_site = registry.by_site_id(1001)
+    assert registry_site is not None
+    assert registry_site.public_key == "site_key_2"
+    assert registry.with_health("ERROR") == {"site_key_2"}
+    assert registry.select(has_battery=True, exclude_health="OK") == {"site_key_2"}
+    assert registry.select(has_battery=False) == set()
+    assert registry.select(has_consumption_meter=False, health="OK") == {"site_key_1"}
+
+    # Site 2 is removed, site 3 is added and site 1 changes health
+    account["data"][0]["health"] = "WARNING"
+    account["data"][1].update(public_key="site_key_3", site_id=1002, health="OK")
+    add_response(aresponses, "", json.dumps(account))
+    _add_site(aresponses, "site_key_3", has_battery=False)
+    assert await registry.refresh() == ({"site_key_3"}, {"site_key_2"})
+    assert registry.by_site_id(1001) is None
+    assert registry.get("site_key_2") is None
+    assert registry.with_health("ERROR") == set()
+    assert registry.select(exclude_health="OK") == {"site_key_1"}
+    assert registry.select(has_battery=False) == {"site_key_3"}
+    assert registry.select() == {"site_key_1", "site_key_3"}
+
+
+async def test_refresh_error(
+    aresponses: ResponsesMockServer,
+    autarco_client: Autarco,
+) -> None:
+    """Test a site that fails to load is retried on the next refresh."""
+    account = json.loads(load_fixtures("account.json"))
+    add_response(aresponses, "", json.dumps(account))
+    _add_site(aresponses, "site_key_1", has_battery=False)
+    aresponses.add(
+        "my.autarco.com",
+        "/api/site/site_key_2/",
+        "GET",
+        aresponses.Response(status=500),
+    )
+    registry = FleetRegistry(autarco_client)
+    with pytest.raises(AutarcoConnectionError):
+        await registry.refresh()
+    assert set(registry.sites) == {"site_key_1"}
+
+    add_response(aresponses, "", json.dumps(account))
+    _add_site(aresponses, "site_key_2", has_battery=False)
+    assert await registry.refresh() == ({"site_key_2"}, set())
+
+
+def _inverter(serial: str, health: str = "OK", *, grid_off: bool = False) -> Inverter:
+    """Create an Inverter object."""
+    return Inverter(
+        serial_number=serial,
+        out_ac_power=100,
+        out_ac_energy_total=6605,
+        grid_turned_off=grid_off,
+        health=health,
+    )
+
+
+def test_inverter_index() -> None:
+    """Test inverters are indexed by serial, health and grid state."""
+    index = InverterIndex()
+    index.update("site_1", {"1": _inverter("A"), "2": _inverter("B", "ERROR")})
+    index.update("site_2", {"3": _inverter("C", grid_off=True)})
+    assert len(index) == 3
+
+    entry = index.find("B")
+    assert entry is not None
+    assert (entry.public_key, entry.inverter_id) == ("site_1", "2")
+    assert index.find("Z") is None
+    assert index.unhealthy() == {"B"}
+    assert index.with_health("OK") == {"A", "C"}
+    assert index.grid_turned_off == {"C"}
+
+    # B recovers, A is no longer reported and C moves to another site
+    index.update("site_1", {"2": _inverter("B"), "4": _inverter("C")})
+    assert index.site_serials("site_1") == {"B", "C"}
+    assert index.site_serials("site_2") == set()
+    assert index.unhealthy() == set()
+    assert index.grid_turned_off == set()
+    assert index.find("A") is None
+
+    index.remove_site("site_1")
+    assert len(index) == 0
+    assert index.with_health("OK") == set()
@@ -0,0 +1,228 @@
+"""Test the adaptive polling scheduler."""
+
+import asyncio
+from typing import cast
+
+import pytest
+from aresponses import ResponsesMockServer
+
+from autarco import AdaptiveScheduler, Autarco, AutarcoConnectionError, Solar
+
+from . import load_fixtures, make_solar
+
+
+class FakeClock:
+    """Manually advanced clock."""
+
+    def __init__(self) -> None:
+        """Start the clock at zero."""
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        """Return the current time."""
+        return self.now
+
+
+def test_sites_are_staggered(autarco_client: Autarco) -> None:
+    """Test sites are spread over the polling interval."""
+    scheduler = AdaptiveScheduler(
+        autarco_client, ["a", "b", "c", "d"], interval=100, clock=FakeClock()
+    )
+    assert [scheduler.cadence(site).next_fetch for site in "abcd"] == [
+        0,
+        25,
+        50,
+        75,
+    ]
+    assert scheduler.due() == [("a", "solar")]
+
+    scheduler.remove_site("a")
+    assert scheduler.sites == ["b", "c", "d"]
+    assert scheduler.next_wakeup() == 25
+
+
+def test_learns_cadence(autarco_client: Autarco) -> None:
+    """Test the refresh interval of a source is learned from value changes."""
+    scheduler = AdaptiveScheduler(autarco_client, ["a"], clock=FakeClock())
+    cadence = scheduler.cadence("a")
+    delays: list[float] = []
+    # The source refreshes every 60 seconds, at 17 seconds past the minute.
+    while (now := cadence.next_fetch) < 6000:
+        refresh = (now - 17) // 60
+        if scheduler.observe("a", "solar", make_solar(100, int(refresh)), now=now):
+            delays.append(now - (17 + refresh * 60))
+    assert cadence.interval == pytest.approx(60, abs=5)
+    assert cadence.bracketed
+    # Once learned, every refresh is seen shortly after it happened.
+    assert max(delays[-50:]) <= 30
+    assert sum(delays[-50:]) / 50 < 20
+    assert len(delays) > 90
+
+
+def test_cadence_is_probed(autarco_client: Autarco) -> None:
+    """Test a refresh is bracketed by probing before the expected moment."""
+    scheduler = AdaptiveScheduler(
+        autarco_client, ["a"], interval=100, margin=2, clock=FakeClock()
+    )
+    cadence = scheduler.cadence("a")
+    assert scheduler.observe("a", "solar", make_solar(100), now=0)
+    assert cadence.next_fetch == 98
+    # The probe sees the change, so the refresh came earlier than expected
+    assert scheduler.observe("a", "solar", make_solar(200), now=98)
+    assert cadence.interval == 50
+    assert not cadence.bracketed
+    assert cadence.next_fetch == 98 + 50 - 2
+
+    # The probe before the expected refresh is unchanged, the fetch after it
+    # is changed, so the refresh is bracketed.
+    assert not scheduler.observe("a", "solar", make_solar(200), now=146)
+    assert cadence.next_fetch == 98 + 50 + 2
+    assert scheduler.observe("a", "solar", make_solar(300), now=150)
+    assert cadence.last_change == 148
+    assert cadence.bracketed
+    assert cadence.changes == 2
+
+    # A late refresh is retried with growing steps
+    assert cadence.next_fetch == 148 + 50 - 2 - 2
+    assert not scheduler.observe("a", "solar", make_solar(300), now=194)
+    assert cadence.next_fetch == 200
+    assert not scheduler.observe("a", "solar", make_solar(300), now=200)
+    assert cadence.next_fetch == 212
+    assert not scheduler.observe("a", "solar", make_solar(300), now=212)
+    assert cadence.next_fetch == 236
+    assert scheduler.observe("a", "solar", make_solar(400), now=236)
+    assert cadence.last_change == 224
+    assert cadence.interval == pytest.approx(0.7 * 50 + 0.3 * 76)
+    assert scheduler.unchanged == 4
+
+
+def test_night_backoff(autarco_client: Autarco) -> None:
+    """Test polling backs off while there is no solar production."""
+    scheduler = AdaptiveScheduler(
+        autarco_client, ["a"], night_interval=3600, clock=FakeClock()
+    )
+    scheduler.observe("a", "solar", make_solar(0), now=10)
+    assert scheduler.cadence("a").next_fetch == 3610
+    scheduler.observe("a", "solar", make_solar(50), now=3610)
+    assert scheduler.cadence("a").next_fetch == 3610 + 300 - 5
+
+
+def test_night_backoff_battery(autarco_client: Autarco) -> None:
+    """Test the battery keeps its cadence while there is no solar production."""
+    scheduler = AdaptiveScheduler(
+        autarco_client,
+        ["a"],
+        endpoints=("solar", "battery", "inverters"),
+        night_interval=3600,
+        clock=FakeClock(),
+    )
+    scheduler.observe("a", "solar", make_solar(0), now=10)
+    scheduler.observe("a", "inverters", {}, now=10)
+    scheduler.observe("a", "battery", object(), now=10)
+    assert scheduler.cadence("a", "solar").next_fetch == 3610
+    assert scheduler.cadence("a", "inverters").next_fetch == 3610
+    assert scheduler.cadence("a", "battery").next_fetch == 10 + 300 - 5
+
+
+def test_unknown_endpoint(autarco_client: Autarco) -> None:
+    """Test an unknown endpoint is rejected."""
+    with pytest.raises(ValueError, match="Unknown endpoint"):
+        AdaptiveScheduler(autarco_client, ["a"], endpoints=("weather",))
+
+
+async def test_fetch(
+    aresponses: ResponsesMockServer,
+    autarco_client: Autarco,
+) -> None:
+    """Test fetching a site endpoint through the scheduler."""
+    for endpoint in ("power", "energy"):
+        aresponses.add(
+            "my.autarco.com",
+            f"/api/site/fake_key/kpis/{endpoint}",
+            "GET",
+            aresponses.Response(
+                text=load_fixtures(f"kpis_{endpoint}.json"),
+                status=200,
+                headers={"Content-Type": "application/json; charset=utf-8"},
+            ),
+        )
+    scheduler = AdaptiveScheduler(autarco_client, ["fake_key"], clock=FakeClock())
+    solar, changed = await scheduler.fetch("fake_key", "solar")
+    assert changed
+    assert solar.power_production == 3323
+    assert scheduler.requests == 1
+
+
+async def test_run() -> None:
+    """Test the polling loop reports changes and survives errors."""
+    clock = FakeClock()
+    values: list[Solar | AutarcoConnectionError] = [
+        AutarcoConnectionError("Timeout"),
+        make_solar(10),
+        make_solar(10),
+        make_solar(20),
+    ]
+
+    class FakeClient:
+        """Client returning the queued values."""
+
+        async def get_solar(self, _: str) -> Solar:
+            """Return the next value."""
+            value = values.pop(0)
+            if isinstance(value, AutarcoConnectionError):
+                raise value
+            return value
+
+    changes: list[Solar] = []
+
+    async def callback(public_key: str, endpoint: str, value: Solar) -> None:
+        """Collect the changes and stop when the queue is drained."""
+        assert (public_key, endpoint) == ("a", "solar")
+        changes.append(value)
+        if not values:
+            scheduler.remove_site("a")
+
+    scheduler = AdaptiveScheduler(
+        cast("Autarco", FakeClient()),
+        ["a"],
+        min_interval=0,
+        interval=0,
+        margin=0,
+        clock=clock,
+    )
+    await scheduler.run(callback)
+    assert changes == [make_solar(10), make_solar(20)]
+    assert scheduler.errors == 1
+    assert scheduler.requests == 4
+
+
+async def test_run_concurrently() -> None:
+    """Test a slow site does not delay the other sites."""
+    stalled = asyncio.Event()
+    fetched: list[str] = []
+
+    class FakeClient:
+        """Client that stalls on one of the sites."""
+
+        async def get_solar(self, public_key: str) -> Solar:
+            """Return a value, or stall until released."""
+            if public_key == "slow":
+                await stalled.wait()
+            fetched.append(public_key)
+            return make_solar(10)
+
+    def callback(public_key: str, _endpoint: str, _value: Solar) -> None:
+        """Stop polling the site after its first value."""
+        scheduler.remove_site(public_key)
+        if public_key == "fast":
+            stalled.set()
+
+    sites = ["slow", "fast"]
+    scheduler = AdaptiveScheduler(
+        cast("Autarco", FakeClient()), sites, interval=0, clock=FakeClock()
+    )
+    await asyncio.wait_for(scheduler.run(callback), timeout=1)
+    assert fetched == ["fast", "slow"]
+    # The list of the caller is left as is
+    assert sites == ["slow", "fast"]
+    assert scheduler.sites == []
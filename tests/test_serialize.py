@@ -0,0 +1,95 @@
+"""Test the bulk serialization of model objects."""
+
+import json
+from dataclasses import dataclass, replace
+
+import orjson
+from mashumaro import DataClassDictMixin
+from mashumaro.config import BaseConfig
+
+from autarco import (
+    Battery,
+    BulkSerializer,
+    Site,
+    SnapshotDiffer,
+    Solar,
+    dumps_batch,
+    dumps_ndjson,
+)
+from autarco.models import AccountResponse, EnergyResponse, PowerResponse
+
+from . import load_fixtures
+
+
+def _site() -> Site:
+    """Load a Site object."""
+    return Site.from_dict(
+        {
+            **json.loads(load_fixtures("site.json")),
+            **json.loads(load_fixtures("kpis_energy.json")),
+        }
+    )
+
+
+def _objects() -> list[DataClassDictMixin]:
+    """Load one object of every model."""
+    power = PowerResponse.from_json(load_fixtures("power.json"))
+    return [
+        _site(),
+        replace(_site(), created_at=None),
+        Solar.from_dict(json.loads(load_fixtures("kpis_energy.json")) | {"pv_now": 1}),
+        Battery.from_dict(
+            json.loads(load_fixtures("battery/kpis_energy.json"))
+            | json.loads(load_fixtures("battery/kpis_power.json"))
+        ),
+        *power.inverters.values(),
+        *AccountResponse.from_json(load_fixtures("account.json")).sites,
+        EnergyResponse.from_json(load_fixtures("energy.json")).stats,
+    ]
+
+
+def test_dumps_batch() -> None:
+    """Test the batch is serialized the same as to_dict per object."""
+    objects = _objects()
+    expected = [obj.to_dict() for obj in objects]
+    assert orjson.loads(dumps_batch(objects)) == orjson.loads(orjson.dumps(expected))
+    assert orjson.loads(dumps_batch(objects))[0]["dt_created"] == "2023-05-15"
+
+    lines = dumps_ndjson(objects).splitlines()
+    assert [orjson.loads(line) for line in lines] == orjson.loads(
+        orjson.dumps(expected)
+    )
+    assert dumps_batch([]) == b"[]"
+
+
+def test_dumps_batch_alias_choices() -> None:
+    """Test aliases with several names are serialized like to_dict."""
+
+    @dataclass
+    class Model(DataClassDictMixin):
+        value: int
+
+        class Config(BaseConfig):
+            aliases = {"value": ("name", "other")}  # noqa: RUF012
+            serialize_by_alias = True
+
+    assert orjson.loads(dumps_batch([Model(1)])) == [{"name": 1}]
+
+
+def test_bulk_serializer() -> None:
+    """Test only changed objects are serialized with a differ."""
+    serializer = BulkSerializer(differ=SnapshotDiffer())
+    power = PowerResponse.from_json(load_fixtures("power.json"))
+    assert serializer.add("site_key_1", _site())
+    assert serializer.add_inverters("site_key_1", power.inverters) == 2
+    assert len(serializer) == 3
+    assert len(orjson.loads(serializer.dumps())) == 3
+    assert len(serializer) == 0
+
+    assert not serializer.add("site_key_1", _site())
+    inverters = dict(power.inverters)
+    inverter_id = next(iter(inverters))
+    inverters[inverter_id] = replace(inverters[inverter_id], out_ac_power=5)
+    assert serializer.add_inverters("site_key_1", inverters) == 1
+    (line,) = serializer.dumps_ndjson().splitlines()
+    assert orjson.loads(line)["out_ac_power"] == 5
@@ -0,0 +1,89 @@
+"""Test the compact series and downsampling."""
+
+from array import array
+from datetime import UTC, datetime, timedelta
+
+import pytest
+
+from autarco import Series, Stats
+from autarco.models import Graphs, PowerResponse
+from autarco.series import average, epoch_seconds, lttb, minmax
+
+from . import load_fixtures
+
+START = datetime.fromisoformat("2024-07-11 00:00:00")
+
+
+def _series(values: list[float]) -> Series:
+    """Create a series with a sample every minute."""
+    return Series(
+        array("d", [START.timestamp() + 60 * i for i in range(len(values))]),
+        array("d", values),
+    )
+
+
+@pytest.mark.usefixtures("vectorized")
+def test_power_series() -> None:
+    """Test the power graph is converted into compact arrays."""
+    stats = Stats(
+        graphs=Graphs(pv_power={"1": {START: 10, START + timedelta(minutes=15): None}}),
+        kpis={},
+    )
+    assert stats.power_series() == {
+        "1": Series(array("d", [1720656000.0]), array("d", [10.0]))
+    }
+    assert Stats(graphs=Graphs(), kpis={}).power_series() == {}
+    assert epoch_seconds([START.replace(tzinfo=UTC)]) == epoch_seconds([START])
+
+
+@pytest.mark.usefixtures("vectorized")
+def test_lttb() -> None:
+    """Test LTTB keeps the ends and the peaks of the curve."""
+    series = _series([0, 1, 0, 1, 9, 1, 0, 1, 0, -9, 0, 1, 0])
+    result = lttb(series, 5)
+    assert len(result.values) == 5
+    assert {9, -9} <= set(result.values)
+    assert result.timestamps[0] == series.timestamps[0]
+    assert result.timestamps[-1] == series.timestamps[-1]
+    assert lttb(series, 20) is series
+    with pytest.raises(ValueError, match="at least 3"):
+        lttb(series, 2)
+
+    stats = PowerResponse.from_json(load_fixtures("power.json")).stats
+    (downsampled,) = stats.lttb(10).values()
+    assert len(downsampled.values) == 10
+    assert (downsampled.values[0], downsampled.values[-1]) == (0, 2354)
+
+
+@pytest.mark.usefixtures("vectorized")
+def test_minmax() -> None:
+    """Test the minimum and maximum of every bucket are kept in time order."""
+    series = _series([3, 1, 2, 8, 5, 5, 7, 0, 4])
+    result = minmax(series, 3)
+    assert result.values == array("d", [3, 1, 8, 5, 7, 0])
+    assert list(result.timestamps) == sorted(result.timestamps)
+    assert minmax(series, 5) is series
+    with pytest.raises(ValueError, match="at least 1"):
+        minmax(series, 0)
+
+    stats = PowerResponse.from_json(load_fixtures("power.json")).stats
+    (downsampled,) = stats.minmax(4).values()
+    assert len(downsampled.values) <= 8
+    assert max(downsampled.values) == 2508
+
+
+@pytest.mark.usefixtures("vectorized")
+def test_average() -> None:
+    """Test the samples are averaged over fixed intervals."""
+    result = average(_series([1, 2, 3, 4, 5]), timedelta(minutes=2))
+    assert result.values == array("d", [1.5, 3.5, 5])
+    assert result.timestamps[1] - result.timestamps[0] == 120
+    for interval in (timedelta(0), timedelta(minutes=-1)):
+        with pytest.raises(ValueError, match="should be positive"):
+            average(_series([1, 2]), interval)
+
+    stats = PowerResponse.from_json(load_fixtures("power.json")).stats
+    (hourly,) = stats.average(timedelta(hours=1)).values()
+    assert len(hourly.values) == 13
+    assert hourly.values[0] == 0
+    assert hourly.values[-1] == pytest.approx((2403 + 2508 + 2354) / 3)
@@ -0,0 +1,164 @@
+"""Test the bounded snapshot stream."""
+
+import asyncio
+
+import pytest
+from aresponses import ResponsesMockServer
+
+from autarco import (
+    Autarco,
+    AutarcoConnectionError,
+    OverflowPolicy,
+    Snapshot,
+    SnapshotStream,
+    Solar,
+)
+
+from . import load_fixtures
+
+
+class FakeFetch:
+    """Fetch numbered snapshots, failing on request."""
+
+    def __init__(self) -> None:
+        """Initialize the fake fetch."""
+        self.calls = 0
+        self.fail = False
+
+    async def __call__(self, public_key: str) -> Snapshot:
+        """Return the next snapshot of a site."""
+        self.calls += 1
+        if self.fail:
+            raise AutarcoConnectionError
+        return Snapshot(
+            public_key=public_key,
+            solar=Solar(
+                power_production=self.calls,
+                energy_production_today=0,
+                energy_production_month=0,
+                energy_production_total=0,
+            ),
+            battery=None,
+            fetched_at=asyncio.get_running_loop().time(),
+        )
+
+
+async def _fill(stream: SnapshotStream, fetch: FakeFetch, calls: int) -> None:
+    """Let the producers run until the fetch was called enough times."""
+    stream.start()
+    for _ in range(100):
+        if fetch.calls >= calls:
+            break
+        await asyncio.sleep(0)
+    await asyncio.sleep(0)
+
+
+async def test_block() -> None:
+    """Test producers wait for room without sending new requests."""
+    fetch = FakeFetch()
+    async with SnapshotStream(fetch, ["a"], interval=0, maxsize=2) as stream:
+        await _fill(stream, fetch, 3)
+        for _ in range(5):
+            await asyncio.sleep(0)
+        assert len(stream) == 2
+        assert fetch.calls == 3
+        assert stream.dropped == 0
+
+        powers = [(await stream.get()).solar.power_production for _ in range(3)]
+        assert powers == [1, 2, 3]
+        assert stream.max_lag >= stream.last_lag >= 0
+
+
+async def test_drop_oldest() -> None:
+    """Test the oldest snapshots are dropped when the buffer is full."""
+    fetch = FakeFetch()
+    async with SnapshotStream(
+        fetch, ["a"], interval=0, maxsize=2, overflow=OverflowPolicy.DROP_OLDEST
+    ) as stream:
+        await _fill(stream, fetch, 5)
+        await stream.close()
+        assert stream.dropped == fetch.calls - 2
+        snapshot = await stream.get()
+        assert snapshot.solar.power_production == fetch.calls - 1
+
+
+async def test_coalesce() -> None:
+    """Test buffered snapshots of a site are replaced by newer ones."""
+    fetch = FakeFetch()
+    async with SnapshotStream(
+        fetch, ["a", "b"], interval=0, maxsize=2, overflow=OverflowPolicy.COALESCE
+    ) as stream:
+        await _fill(stream, fetch, 6)
+        await stream.close()
+        assert len(stream) == 2
+        assert stream.coalesced == fetch.calls - 2
+        assert stream.dropped == 0
+        latest = {(await stream.get()).solar.power_production for _ in range(2)}
+        assert latest == {fetch.calls - 1, fetch.calls}
+
+
+async def test_errors() -> None:
+    """Test failing fetches are counted and polling continues."""
+    fetch = FakeFetch()
+    fetch.fail = True
+    async with SnapshotStream(fetch, ["a"], interval=0) as stream:
+        await _fill(stream, fetch, 3)
+        fetch.fail = False
+        async for snapshot in stream:
+            assert snapshot.public_key == "a"
+            break
+    assert stream.errors >= 3
+
+
+async def test_producer_failure() -> None:
+    """Test an unexpected fetch error is raised instead of waiting forever."""
+
+    async def fetch(_: str) -> Snapshot:
+        msg = "Invalid response"
+        raise ValueError(msg)
+
+    async with SnapshotStream(fetch, ["a"], interval=0) as stream:
+        with pytest.raises(ValueError, match="Invalid response"):
+            async with asyncio.timeout(1):
+                await anext(stream)
+        with pytest.raises(ValueError, match="Invalid response"):
+            await stream.get()
+    assert stream.errors == 0
+
+
+async def test_client_stream(
+    aresponses: ResponsesMockServer,
+    autarco_client: Autarco,
+) -> None:
+    """Test streaming snapshots from the client, with battery data."""
+    for endpoint in ("power", "energy"):
+        aresponses.add(
+            "my.autarco.com",
+            f"/api/site/battery_key/kpis/{endpoint}",
+            "GET",
+            aresponses.Response(
+                text=load_fixtures(f"battery/kpis_{endpoint}.json"),
+                status=200,
+                headers={"Content-Type": "application/json; charset=utf-8"},
+            ),
+        )
+        aresponses.add(
+            "my.autarco.com",
+            f"/api/site/solar_key/kpis/{endpoint}",
+            "GET",
+            aresponses.Response(
+                text=load_fixtures(f"kpis_{endpoint}.json"),
+                status=200,
+                headers={"Content-Type": "application/json; charset=utf-8"},
+            ),
+        )
+    async with autarco_client.stream(
+        ["battery_key", "solar_key"], interval=60
+    ) as stream:
+        snapshots = {
+            snapshot.public_key: snapshot
+            for snapshot in [await stream.get(), await stream.get()]
+        }
+    assert snapshots["battery_key"].battery is not None
+    assert snapshots["solar_key"].battery is None
+    assert snapshots["solar_key"].solar.power_production == 3323
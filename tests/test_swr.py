@@ -0,0 +1,99 @@
+"""Test the stale-while-revalidate reads."""
+
+import asyncio
+from typing import cast
+
+import pytest
+
+from autarco import Autarco, AutarcoConnectionError, Solar, StaleWhileRevalidate
+
+from . import make_solar
+
+
+class FakeClient:
+    """Client returning an increasing power production."""
+
+    def __init__(self) -> None:
+        """Initialize the fake client."""
+        self.calls = 0
+        self.fail = False
+        self.release = asyncio.Event()
+        self.release.set()
+
+    async def get_solar(self, _: str) -> Solar:
+        """Return the next Solar object."""
+        self.calls += 1
+        await self.release.wait()
+        if self.fail:
+            raise AutarcoConnectionError
+        return make_solar(self.calls)
+
+    get_battery = get_solar
+
+
+async def test_fresh_and_stale() -> None:
+    """Test fresh reads are cached and stale reads refresh in the background."""
+    now = [0.0]
+    client = FakeClient()
+    swr = StaleWhileRevalidate(
+        cast("Autarco", client),
+        fresh_for=5,
+        max_stale=60,
+        clock=lambda: now[0],
+    )
+    first = await swr.get_solar("site")
+    assert first.value.power_production == 1
+    assert not first.stale
+
+    now[0] = 3
+    cached = await swr.get_solar("site")
+    assert cached.age == 3
+    assert client.calls == 1
+
+    # Stale reads answer immediately, with a single refresh per endpoint
+    now[0] = 10
+    client.release.clear()
+    stale = await asyncio.gather(swr.get_solar("site"), swr.get_solar("site"))
+    assert [result.value.power_production for result in stale] == [1, 1]
+    assert all(result.stale and result.age == 10 for result in stale)
+    client.release.set()
+    await asyncio.sleep(0)
+    assert client.calls == 2
+    assert (await swr.get_solar("site")).value.power_production == 2
+
+
+async def test_refresh_errors() -> None:
+    """Test stale data is served on errors until the maximum age."""
+    now = [0.0]
+    client = FakeClient()
+    swr = StaleWhileRevalidate(
+        cast("Autarco", client),
+        fresh_for=5,
+        max_stale=60,
+        clock=lambda: now[0],
+    )
+    await swr.get_solar("site")
+    client.fail = True
+
+    now[0] = 30
+    assert (await swr.get_solar("site")).error is None
+    await asyncio.sleep(0)
+    cached = await swr.get_solar("site")
+    assert cached.stale
+    assert isinstance(cached.error, AutarcoConnectionError)
+
+    now[0] = 61
+    with pytest.raises(AutarcoConnectionError):
+        await swr.get_solar("site")
+
+
+async def test_close() -> None:
+    """Test running refreshes are cancelled on close."""
+    client = FakeClient()
+    client.release.clear()
+    swr = StaleWhileRevalidate(cast("Autarco", client))
+    task = asyncio.create_task(swr.get_battery("site"))
+    await asyncio.sleep(0)
+    await swr.close()
+    with pytest.raises(asyncio.CancelledError):
+        await task
@@ -0,0 +1,140 @@
+"""Test the latency-adaptive timeouts."""
+
+# pylint: disable=protected-access
+import asyncio
+from typing import Any
+
+import pytest
+from aiohttp import ClientResponse, ClientSession
+from aresponses import Response, ResponsesMockServer
+
+from autarco import (
+    Autarco,
+    AutarcoConnectionError,
+    LatencyTracker,
+    TimeoutConfig,
+    timeout_override,
+)
+
+from . import load_fixtures
+
+
+def _client(**kwargs: Any) -> Autarco:
+    """Return a client with a tracker that needs few samples."""
+    return Autarco(
+        email="test@autarco.com",
+        password="energy",
+        latency=LatencyTracker(min_samples=2),
+        **kwargs,
+    )
+
+
+def test_static_timeout() -> None:
+    """Test the request timeout is used without adaptive timeouts."""
+    client = _client(request_timeout=15)
+    client.latency.record("{public_key}/kpis/power", 0.1)
+    client.latency.record("{public_key}/kpis/power", 0.1)
+    assert client._timeout("site/kpis/power") == 15
+
+
+def test_adaptive_timeout() -> None:
+    """Test timeouts follow the latency of the endpoint within the bounds."""
+    client = _client(timeouts=TimeoutConfig(minimum=1, maximum=30), request_timeout=15)
+    assert client._timeout("site/kpis/power") == 15
+
+    for seconds in (0.5, 0.6):
+        client.latency.record("{public_key}/kpis/power", seconds)
+    for seconds in (8.0, 12.0):
+        client.latency.record("{public_key}/power", seconds)
+    for seconds in (0.01, 0.01):
+        client.latency.record("{public_key}/", seconds)
+
+    assert client._timeout("site/kpis/power") == pytest.approx(0.599 * 3)
+    assert client._timeout("site/power") == 30
+    assert client._timeout("site/") == 1
+
+    with timeout_override(5):
+        assert client._timeout("site/power") == 5
+    assert client._timeout("site/power") == 30
+
+
+async def test_adaptive_timeout_in_request(aresponses: ResponsesMockServer) -> None:
+    """Test a stuck request fails fast with an adaptive timeout."""
+
+    async def response_handler(_: ClientResponse) -> Response:
+        await asyncio.sleep(0.5)
+        return aresponses.Response(body="Goodmorning!")
+
+    aresponses.add("my.autarco.com", "/api/site/test", "GET", response_handler)
+    async with ClientSession() as session:
+        client = _client(timeouts=TimeoutConfig(minimum=0.1))
+        client.session = session
+        for _ in range(2):
+            client.latency.record("{public_key}/", 0.01)
+        with pytest.raises(AutarcoConnectionError):
+            await client._request("test")
+
+
+def test_adaptive_timeout_fallback_bounds() -> None:
+    """Test the request timeout is kept within the bounds without samples."""
+    client = _client(timeouts=TimeoutConfig(maximum=10), request_timeout=15)
+    assert client._timeout("site/power") == 10
+    client = _client(timeouts=TimeoutConfig(minimum=20), request_timeout=15)
+    assert client._timeout("site/power") == 20
+
+
+async def test_adaptive_timeout_recovers(aresponses: ResponsesMockServer) -> None:
+    """Test timed out requests let the timeout grow for a slower endpoint."""
+
+    async def response_handler(_: ClientResponse) -> Response:
+        await asyncio.sleep(0.2)
+        return aresponses.Response(
+            text="{}",
+            headers={"Content-Type": "application/json; charset=utf-8"},
+        )
+
+    aresponses.add(
+        "my.autarco.com", "/api/site/test", "GET", response_handler, repeat=30
+    )
+    async with ClientSession() as session:
+        client = _client(timeouts=TimeoutConfig(minimum=0.05), session=session)
+        client.latency.min_samples = 20
+        for _ in range(20):
+            client.latency.record("{public_key}/", 0.01)
+        assert client._timeout("test") == 0.05
+
+        failures = 0
+        for _ in range(30):
+            try:
+                await client._request("test")
+            except AutarcoConnectionError:
+                failures += 1
+            else:
+                break
+    assert 0 < failures < 30
+    assert client._timeout("test") > 0.2
+
+
+async def test_adaptive_timeout_per_range(aresponses: ResponsesMockServer) -> None:
+    """Test fast inverter requests do not shorten the timeout of long ranges."""
+    for _ in range(2):
+        aresponses.add(
+            "my.autarco.com",
+            "/api/site/fake_key/power",
+            "GET",
+            aresponses.Response(
+                text=load_fixtures("power.json"),
+                status=200,
+                headers={"Content-Type": "application/json; charset=utf-8"},
+            ),
+        )
+    async with ClientSession() as session:
+        client = _client(timeouts=TimeoutConfig(), request_timeout=15, session=session)
+        for _ in range(2):
+            await client.get_inverters("fake_key")
+    assert client._timeout("fake_key/power") == TimeoutConfig().minimum
+    assert client._timeout("fake_key/power", {"r": "year"}) == 15
+
+    for seconds in (8.0, 9.0):
+        client.latency.record("{public_key}/power?r=year", seconds)
+    assert client._timeout("fake_key/power", {"r": "year"}) == pytest.approx(8.99 * 3)
@@ -0,0 +1,55 @@
+"""Test the warm-up of the Autarco client."""
+
+import pytest
+from aresponses import ResponsesMockServer
+
+from autarco import Autarco, AutarcoAuthenticationError, LocalEnergyConfig
+
+from . import add_response, freeze_time, load_fixtures
+
+
+async def test_warm_up(
+    aresponses: ResponsesMockServer, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test the warm-up opens connections and primes the power statistics."""
+    freeze_time(monkeypatch)
+    for _ in range(3):
+        add_response(aresponses, "", load_fixtures("account.json"))
+    add_response(aresponses, "site_key_1/power", load_fixtures("power.json"))
+    add_response(aresponses, "site_key_2/power", load_fixtures("power.json"))
+
+    async with Autarco(
+        email="test@autarco.com",
+        password="energy",
+        warm_up_connections=3,
+        local_energy=LocalEnergyConfig(),
+    ) as client:
+        assert client.session is not None
+        aresponses.assert_plan_strictly_followed()
+        assert await client.get_energy_today("site_key_2") == pytest.approx(6.0505)
+    assert client.session.closed
+
+
+async def test_warm_up_authentication(aresponses: ResponsesMockServer) -> None:
+    """Test invalid credentials are found on enter, and the session closed."""
+    for _ in range(2):
+        aresponses.add(
+            "my.autarco.com",
+            "/api/site/",
+            "GET",
+            aresponses.Response(status=401),
+        )
+
+    client = Autarco(email="test@autarco.com", password="wrong", warm_up_connections=2)
+    with pytest.raises(AutarcoAuthenticationError):
+        async with client:
+            pass
+    assert client.session is not None
+    assert client.session.closed
+
+
+async def test_no_warm_up(aresponses: ResponsesMockServer) -> None:
+    """Test no requests are sent on enter by default."""
+    async with Autarco(email="test@autarco.com", password="energy") as client:
+        assert client.session is None
+    aresponses.assert_plan_strictly_followed()